@@ -26,7 +26,7 @@ project_root = Path(__file__).parent.parent.absolute()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from agents.shared.message_bus import MessageBus
+from agents.shared.message_bus import create_bus
 from agents.shared.state import PortfolioState
 from utils.config import load_parameters
 from agents.backtest_agent import BacktestAgent
@@ -61,7 +61,7 @@ class Orchestrator:
         self.run_id = str(uuid.uuid4())
         self.user_id = user_id
         self.account_id = account_id
-        self.bus = MessageBus()
+        self.bus = create_bus()
         self.state = PortfolioState.load()
         self.state.run_id = self.run_id
         self.state.started_at = datetime.now(timezone.utc).isoformat()
@@ -151,7 +151,7 @@ class Orchestrator:
         try:
             result = self.backtester.run(request)
             agent_state.set_completed()
-            self.state.backtest_results.append(result)
+            self.state.record_backtest_result(result)
             self.state.best_config = result.get("best_config")
             self.state.save()
             if self._mode == "backtest":
@@ -212,7 +212,7 @@ class Orchestrator:
             result = self.validator.run(request)
             agent_state.set_completed()
             agent_state.iteration_count = result.get("iterations_used", 0)
-            self.state.validation_results.append(result)
+            self.state.record_validation_result(result)
             self.state.save()
             store_validation(request.get("run_id", self.run_id), result,
                                  user_id=self.user_id)
@@ -470,7 +470,7 @@ class Orchestrator:
     def _save_final(self, results: Dict):
         """Save final results and state."""
         self.state.completed_at = datetime.now(timezone.utc).isoformat()
-        self.state.run_history.append({
+        self.state.record_run({
             "run_id": self.run_id,
             "status": results.get("status"),
             "started_at": self.state.started_at,
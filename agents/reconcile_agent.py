@@ -21,6 +21,10 @@ from utils.alpaca_util import AlpacaAPI
 
 logger = logging.getLogger(__name__)
 
+# Alpaca caps a single get_orders() page at 500; the DB side of the
+# reconciliation is bounded to the same window size.
+ALPACA_ORDER_LIMIT = 500
+
 
 class ReconciliationResult:
     """Result of a reconciliation run."""
@@ -203,7 +207,7 @@ class ReconcileAgent:
             status="closed",
             after=window_start.isoformat(),
             until=window_end.isoformat(),
-            limit=500,
+            limit=ALPACA_ORDER_LIMIT,
         )
         if isinstance(alpaca_orders, dict) and "error" in alpaca_orders:
             trade_mismatches.append({
@@ -237,15 +241,22 @@ class ReconcileAgent:
                 })
 
         # Trades in DB with order_ids not in Alpaca
+        extra_ids = [
+            t["order_id"] for t in db_trades
+            if t.get("order_id") and t["order_id"] not in alpaca_by_id
+        ]
+        details = self._get_db_trade_details(extra_ids) if extra_ids else {}
         for trade in db_trades:
             order_id = trade.get("order_id")
             if order_id and order_id not in alpaca_by_id:
-                extra_trades.append({
+                extra = {
                     "order_id": order_id,
                     "symbol": trade.get("symbol"),
                     "side": trade.get("side"),
                     "message": f"Order {order_id[:8]}... ({trade.get('symbol')}) in DB but not Alpaca",
-                })
+                }
+                extra.update(details.get(order_id, {}))
+                extra_trades.append(extra)
 
         return trade_mismatches, missing_trades, extra_trades
 
@@ -294,43 +305,48 @@ class ReconcileAgent:
 
     def _get_db_trades(self, window_start: datetime,
                        window_end: datetime) -> List[Dict]:
-        """Fetch paper trades from DB in the given window."""
+        """Fetch paper trade order ids from DB in the given window.
+
+        Only the columns reconciliation needs are selected; the full row
+        is fetched later via ``_get_db_trade_details`` for mismatches only.
+        """
         try:
             from utils.db.db_pool import DatabasePool
             from sqlalchemy import text
 
             pool = DatabasePool()
             with pool.get_session() as session:
-                params = {"start": window_start, "end": window_end}
+                params = {"start": window_start, "end": window_end,
+                          "lim": ALPACA_ORDER_LIMIT}
                 user_filter = ""
                 if self.user_id:
                     user_filter = "AND user_id = :user_id"
                     params["user_id"] = self.user_id
                 result = session.execute(
                     text(f"""
-                        SELECT symbol, direction, shares, entry_price, exit_price,
-                               pnl, trade_type, created_at, order_id
+                        SELECT order_id, symbol, direction
                         FROM alpatrade.trades
                         WHERE trade_type = 'paper'
+                          AND order_id IS NOT NULL
                           AND created_at >= :start
                           AND created_at <= :end
                           {user_filter}
                         ORDER BY created_at
+                        LIMIT :lim
                     """),
                     params,
                 )
                 rows = result.fetchall()
+                if len(rows) >= ALPACA_ORDER_LIMIT:
+                    logger.warning(
+                        f"DB trade window hit the {ALPACA_ORDER_LIMIT}-row limit; "
+                        f"reconciliation may be incomplete — narrow the window"
+                    )
                 return [
                     {
-                        "symbol": r[0],
-                        "side": "buy" if r[1] == "long" else "sell",
-                        "shares": float(r[2]) if r[2] else 0,
-                        "entry_price": float(r[3]) if r[3] else 0,
-                        "exit_price": float(r[4]) if r[4] else None,
-                        "pnl": float(r[5]) if r[5] else 0,
-                        "trade_type": r[6],
-                        "created_at": r[7],
-                        "order_id": r[8],
+                        "order_id": r[0],
+                        "symbol": r[1],
+                        "side": "buy" if r[2] == "long" else "sell",
                     }
                     for r in rows
                 ]
@@ -338,6 +354,38 @@ class ReconcileAgent:
             logger.warning(f"Could not fetch DB trades: {e}")
             return []
 
+    def _get_db_trade_details(self, order_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch the full DB rows for the given order ids, keyed by order_id."""
+        try:
+            from utils.db.db_pool import DatabasePool
+            from sqlalchemy import text
+
+            pool = DatabasePool()
+            with pool.get_session() as session:
+                result = session.execute(
+                    text("""
+                        SELECT order_id, shares, entry_price, exit_price,
+                               pnl, created_at
+                        FROM alpatrade.trades
+                        WHERE trade_type = 'paper'
+                          AND order_id = ANY(:order_ids)
+                    """),
+                    {"order_ids": list(order_ids)},
+                )
+                return {
+                    r[0]: {
+                        "shares": float(r[1]) if r[1] else 0,
+                        "entry_price": float(r[2]) if r[2] else 0,
+                        "exit_price": float(r[3]) if r[3] else None,
+                        "pnl": float(r[4]) if r[4] else 0,
+                        "created_at": r[5],
+                    }
+                    for r in result.fetchall()
+                }
+        except Exception as e:
+            logger.warning(f"Could not fetch DB trade details: {e}")
+            return {}
+
     def _get_db_total_pnl(self) -> float:
         """Get total P&L from DB paper trades."""
         try:
@@ -17,6 +17,10 @@ if str(project_root) not in sys.path:
 
 logger = logging.getLogger(__name__)
 
+# backtest_summaries aggregate columns returned as floats by top_strategies()
+_TOP_FLOAT_COLS = ("avg_sharpe", "avg_return", "avg_ann_return",
+                   "avg_win_rate", "avg_drawdown", "avg_pnl")
+
 
 class ReportAgent:
     """Agent that generates trading performance reports from DB data."""
@@ -108,30 +112,26 @@ class ReportAgent:
                     LIMIT :lim
                 """),
                 bind,
-            ).fetchall()
+            ).mappings().all()
 
         results = []
         for row in rows:
-            (run_id, mode, strategy, strategy_slug, status, started_at,
-             completed_at, config_json, bt_pnl, bt_return, bt_sharpe,
-             bt_trades, bt_win_rate, bt_ann_ret,
-             paper_pnl, paper_trades, paper_wins,
-             data_start, data_end) = row
-
-            initial_capital = self._initial_capital(config_json)
+            mode = row["mode"]
+            data_start = row["data_start"]
+            data_end = row["data_end"]
+            initial_capital = self._initial_capital(row["config"])
 
             # Pick metrics based on mode
-            if mode == "backtest" and bt_pnl is not None:
-                total_pnl = float(bt_pnl)
-                total_return = float(bt_return or 0)
-                sharpe = float(bt_sharpe or 0)
-                trades_count = int(bt_trades or 0)
-                ann_ret = float(bt_ann_ret or 0)
-            elif mode == "paper" and paper_trades:
-                total_pnl = float(paper_pnl or 0)
+            if mode == "backtest" and row["bt_pnl"] is not None:
+                total_pnl = float(row["bt_pnl"])
+                total_return = float(row["bt_return"] or 0)
+                sharpe = float(row["bt_sharpe"] or 0)
+                trades_count = int(row["bt_trades"] or 0)
+                ann_ret = float(row["bt_ann_ret"] or 0)
+            elif mode == "paper" and row["paper_trades"]:
+                total_pnl = float(row["paper_pnl"] or 0)
                 total_return = (total_pnl / initial_capital * 100) if initial_capital else 0
-                trades_count = int(paper_trades or 0)
-                wins = int(paper_wins or 0)
+                trades_count = int(row["paper_trades"] or 0)
                 # Annualized return from period
                 if data_start and data_end:
                     days = (data_end - data_start).total_seconds() / 86400
@@ -148,11 +148,11 @@ class ReportAgent:
                 ann_ret = 0
 
             results.append({
-                "run_id": run_id,
+                "run_id": row["run_id"],
                 "mode": mode,
-                "strategy": strategy,
-                "strategy_slug": strategy_slug,
-                "status": status,
+                "strategy": row["strategy"],
+                "strategy_slug": row["strategy_slug"],
+                "status": row["status"],
                 "initial_capital": initial_capital,
                 "total_pnl": total_pnl,
                 "total_return": total_return,
@@ -161,7 +161,7 @@ class ReportAgent:
                 "total_trades": trades_count,
                 "data_start": data_start,
                 "data_end": data_end,
-                "run_date": started_at,
+                "run_date": row["started_at"],
             })
 
         return results
@@ -193,24 +193,19 @@ class ReportAgent:
                 sql += " AND user_id = :user_id"
                 bind["user_id"] = user_id
             sql += " ORDER BY created_at DESC LIMIT 1"
-            run_row = session.execute(text(sql), bind).fetchone()
+            run_row = session.execute(text(sql), bind).mappings().first()
 
             if not run_row:
                 return None
 
-            run_id, mode, strategy, status, config_json, started_at, completed_at = run_row
-            initial_capital = self._initial_capital(config_json)
-
-            if mode == "backtest":
-                return self._detail_backtest(
-                    session, run_id, mode, strategy, status,
-                    initial_capital, started_at, completed_at,
-                )
-            else:
-                return self._detail_paper(
-                    session, run_id, mode, strategy, status,
-                    initial_capital, started_at, completed_at,
-                )
+            initial_capital = self._initial_capital(run_row["config"])
+            detail_fn = (self._detail_backtest if run_row["mode"] == "backtest"
+                         else self._detail_paper)
+            return detail_fn(
+                session, run_row["run_id"], run_row["mode"], run_row["strategy"],
+                run_row["status"], initial_capital,
+                run_row["started_at"], run_row["completed_at"],
+            )
 
     def top_strategies(self, strategy: Optional[str] = None,
                         trade_type: Optional[str] = None,
@@ -288,25 +283,18 @@ class ReportAgent:
                     LIMIT :lim
                 """),
                 bind,
-            ).fetchall()
-
-        results = []
-        for row in rows:
-            (slug, avg_sharpe, avg_return, avg_ann_return, avg_win_rate,
-             avg_drawdown, total_trades, total_runs, avg_pnl) = row
-            results.append({
-                "strategy_slug": slug,
-                "avg_sharpe": float(avg_sharpe or 0),
-                "avg_return": float(avg_return or 0),
-                "avg_ann_return": float(avg_ann_return or 0),
-                "avg_win_rate": float(avg_win_rate or 0),
-                "avg_drawdown": float(avg_drawdown or 0),
-                "total_trades": int(total_trades or 0),
-                "total_runs": int(total_runs or 0),
-                "avg_pnl": float(avg_pnl or 0),
+            ).mappings().all()
+
+        return [
+            {
+                "strategy_slug": row["strategy_slug"],
+                **{k: float(row[k] or 0) for k in _TOP_FLOAT_COLS},
+                "total_trades": int(row["total_trades"] or 0),
+                "total_runs": int(row["total_runs"] or 0),
                 "type": trade_type or "backtest",
-            })
-        return results
+            }
+            for row in rows
+        ]
 
     def _top_paper(self, strategy: Optional[str] = None,
                    limit: int = 20,
@@ -348,14 +336,16 @@ class ReportAgent:
                     LIMIT :lim
                 """),
                 bind,
-            ).fetchall()
+            ).mappings().all()
 
         results = []
         for row in rows:
-            slug, total_pnl, total_trades, wins, total_runs = row
-            win_rate = (float(wins) / float(total_trades) * 100) if total_trades else 0
+            total_pnl = row["total_pnl"]
+            total_trades = row["total_trades"]
+            total_runs = row["total_runs"]
+            win_rate = (float(row["wins"]) / float(total_trades) * 100) if total_trades else 0
             results.append({
-                "strategy_slug": slug,
+                "strategy_slug": row["strategy_slug"],
                 "avg_sharpe": 0,
                 "avg_return": 0,
                 "avg_ann_return": 0,
@@ -384,7 +374,7 @@ class ReportAgent:
                 WHERE run_id = :run_id AND is_best = true
             """),
             {"run_id": run_id},
-        ).fetchone()
+        ).mappings().first()
 
         # Data period from trades
         tp = session.execute(
@@ -398,9 +388,14 @@ class ReportAgent:
         data_end = tp[1] if tp else None
 
         if bs:
-            total_return, total_pnl, sharpe, max_dd, ann_ret, win_rate, total_trades, bs_slug = bs
-            total_pnl = float(total_pnl or 0)
-            total_return = float(total_return or 0)
+            total_pnl = float(bs["total_pnl"] or 0)
+            total_return = float(bs["total_return"] or 0)
+            sharpe = bs["sharpe_ratio"]
+            max_dd = bs["max_drawdown"]
+            ann_ret = bs["annualized_return"]
+            win_rate = bs["win_rate"]
+            total_trades = bs["total_trades"]
+            bs_slug = bs["strategy_slug"]
             final_capital = initial_capital + total_pnl
             winning = int(round(float(win_rate or 0) / 100 * float(total_trades or 0)))
             losing = int(total_trades or 0) - winning
@@ -6,15 +6,25 @@ from the configured Yahoo Finance or Alpaca feed. Validates price accuracy, P&L
 and strategy logic. Self-corrects up to n=10 iterations before escalating.
 """
 
+import re
 import sys
+import calendar
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Callable, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 import numpy as np
-import pytz
+import pandas as pd
+
+try:
+    from numba import njit, prange
+except ImportError:  # optional; the NumPy kernels below are used without it
+    njit = None
 
 # Ensure project root is importable
 project_root = Path(__file__).parent.parent.absolute()
@@ -26,7 +36,99 @@ from utils.agent_storage import fetch_backtest_trades, fetch_paper_trades
 
 logger = logging.getLogger(__name__)
 
-EASTERN = pytz.timezone("US/Eastern")
+EASTERN = ZoneInfo("America/New_York")
+
+# Concurrent symbol-day fetches; kept under Alpaca's data API rate limit.
+PREFETCH_WORKERS = 8
+
+# Correction types that change trade data; "flagged" ones never do.
+_DATA_CORRECTIONS = frozenset({"pnl_recalculation", "price_correction"})
+
+# Trades per check from which the Numba kernels beat NumPy's per-op overhead.
+NUMBA_MIN_TRADES = 5_000
+
+# Market-hours windows as inclusive ET minute-of-day bounds, by extended_hours.
+_MARKET_WINDOWS = {
+    True: (4 * 60, 20 * 60, "4AM-8PM"),        # Extended: 4:00 AM - 8:00 PM ET
+    False: (9 * 60 + 30, 16 * 60, "9:30AM-4PM"),  # Regular, inclusive of close
+}
+
+# Leading "YYYY-MM-DD[ T]HH:MM" of strings datetime.fromisoformat can take.
+_ISO_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}|$)")
+
+_TIME_FIELDS = ("entry_time", "exit_time")
+
+_NAT = np.iinfo(np.int64).min  # NaT in asi8 form
+_NS_PER_MINUTE = 60 * 10**9
+_NS_PER_DAY = 86_400 * 10**9
+_EPOCH_DAY = pd.Timestamp("1970-01-01")
+
+
+def _utc_today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _float_column(values: List[Any]) -> np.ndarray:
+    """Trade field values as a float64 array, None -> NaN."""
+    return np.fromiter((np.nan if v is None else float(v) for v in values),
+                       dtype=np.float64, count=len(values))
+
+
+def _pnl_mismatch_np(entry, exit_p, shares, fees, recorded, atol):
+    expected = (exit_p - entry) * shares - fees
+    known = np.isfinite(entry) & np.isfinite(exit_p) & np.isfinite(shares) & np.isfinite(recorded)
+    return expected, known & ~np.isclose(recorded, expected, atol=atol)
+
+
+def _price_deviation_np(recorded, actual, tolerance):
+    checked = np.isfinite(recorded) & (recorded != 0) & np.isfinite(actual)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diff = np.abs(recorded - actual) / actual
+    return diff, checked & (diff > tolerance)
+
+
+if njit is not None:
+    # Same results as the NumPy versions in one fused, multi-threaded pass
+    # with the GIL released. No fastmath: NaN marks missing values.
+    @njit(parallel=True, cache=True)
+    def _pnl_mismatch_nb(entry, exit_p, shares, fees, recorded, atol):
+        n = entry.shape[0]
+        expected = np.empty(n)
+        mismatch = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            e = (exit_p[i] - entry[i]) * shares[i] - fees[i]
+            expected[i] = e
+            if (np.isfinite(entry[i]) and np.isfinite(exit_p[i])
+                    and np.isfinite(shares[i]) and np.isfinite(recorded[i])):
+                # np.isclose(recorded, expected, atol=atol), default rtol
+                mismatch[i] = not abs(recorded[i] - e) <= atol + 1e-05 * abs(e)
+        return expected, mismatch
+
+    @njit(parallel=True, cache=True)
+    def _price_deviation_nb(recorded, actual, tolerance):
+        n = recorded.shape[0]
+        diff = np.empty(n)
+        flagged = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            r, a = recorded[i], actual[i]
+            d = abs(r - a) / a if a != 0 else np.inf
+            diff[i] = d
+            flagged[i] = np.isfinite(r) and r != 0 and np.isfinite(a) and d > tolerance
+        return diff, flagged
+
+
+def _pnl_mismatch(entry, exit_p, shares, fees, recorded, atol):
+    """Expected P&L and a mask of trades whose recorded P&L disagrees."""
+    if njit is not None and len(entry) >= NUMBA_MIN_TRADES:
+        return _pnl_mismatch_nb(entry, exit_p, shares, fees, recorded, atol)
+    return _pnl_mismatch_np(entry, exit_p, shares, fees, recorded, atol)
+
+
+def _price_deviation(recorded, actual, tolerance):
+    """Relative price deviation and a mask of prices beyond `tolerance`."""
+    if njit is not None and len(recorded) >= NUMBA_MIN_TRADES:
+        return _price_deviation_nb(recorded, actual, tolerance)
+    return _price_deviation_np(recorded, actual, tolerance)
 
 
 class ValidationResult:
@@ -62,15 +164,46 @@ class ValidationResult:
 class ValidateAgent:
     """Agent that validates trades against market data with self-correction."""
 
+    # Suggestion per unresolved anomaly type, in reporting order.
+    _SUGGESTIONS: Dict[str, str] = {
+        "weekend_trade": (
+            "Weekend trades detected. Check the data source for incorrect timestamps "
+            "or ensure the backtester skips weekends."
+        ),
+        "market_hours": (
+            "Trades outside market hours detected. Verify the data source provides "
+            "correct timestamps and that the strategy respects trading hours."
+        ),
+        "price_tolerance": (
+            "Significant price deviations from market data. This may indicate "
+            "stale price data or data feed issues. Consider re-running with a "
+            "different data source."
+        ),
+        "tp_sl_conflict": (
+            "Take profit and stop loss both triggered on the same trade. "
+            "Review the strategy exit logic for race conditions."
+        ),
+        "pnl_math": (
+            "P&L calculation mismatches remain after correction. Manually "
+            "verify the fee calculations and entry/exit prices."
+        ),
+    }
+
     def __init__(self, message_bus=None, state=None, max_iterations: int = 10,
-                 price_tolerance: float = 0.01, user_id=None):
+                 price_tolerance: float = 0.01, user_id=None,
+                 prefetch_workers: int = PREFETCH_WORKERS):
         self.message_bus = message_bus
         self.state = state
         self.user_id = user_id
         self.max_iterations = max_iterations
         self.price_tolerance = price_tolerance
+        self.prefetch_workers = prefetch_workers
         self.market_data = MarketDataUtil()
         self.extended_hours = True
+        # (symbol, UTC day) -> bars, kept for one run() only: each correction
+        # iteration re-checks the same trades, but a later run (e.g. paper
+        # validation hours after the backtest pass) must see fresh data.
+        self._day_bars: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
 
     def run(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -87,6 +220,13 @@ class ValidateAgent:
         Returns:
             ValidationResult as dict
         """
+        self._day_bars = {}
+        try:
+            return self._run(request)
+        finally:
+            self._day_bars = {}
+
+    def _run(self, request: Dict[str, Any]) -> Dict[str, Any]:
         run_id = request.get("run_id", str(uuid.uuid4()))
         source = request.get("source", "backtest")
         max_iter = request.get("max_iterations", self.max_iterations)
@@ -108,20 +248,29 @@ class ValidateAgent:
 
         logger.info(f"Validating {len(trades)} trades (max {max_iter} iterations)")
 
+        # Checks and corrections work on columns, not per-trade dicts
+        frame = self._to_frame(trades)
+        check = self._build_checker(tolerance)
         all_corrections = []
+        anomalies, changed = None, None
+        iterations_used = max_iter
 
         for iteration in range(max_iter):
             logger.info(f"  Iteration {iteration + 1}/{max_iter}")
 
-            # Run all validation checks
-            anomalies = self._run_checks(trades, tolerance)
+            # Run all validation checks; after the first pass only the
+            # corrected trades can produce different results.
+            if anomalies is None:
+                anomalies = check(frame)
+            else:
+                anomalies = self._recheck(frame, check, anomalies, changed)
 
             if not anomalies:
                 logger.info(f"  All checks passed on iteration {iteration + 1}")
                 result = ValidationResult(
                     status="corrected" if all_corrections else "passed",
                     run_id=run_id,
-                    total_checked=len(trades),
+                    total_checked=len(frame),
                     corrections=all_corrections,
                     iterations_used=iteration + 1,
                 )
@@ -131,28 +280,41 @@ class ValidateAgent:
             logger.info(f"  Found {len(anomalies)} anomalies, attempting corrections")
 
             # Attempt corrections
-            corrections = self._attempt_corrections(trades, anomalies)
+            corrections = self._attempt_corrections(frame, anomalies)
             all_corrections.extend(corrections)
 
+            changed = {c["trade_index"] for c in corrections if c["type"] in _DATA_CORRECTIONS}
+            if not changed:
+                # Only flagged anomalies left: further passes cannot change anything
+                logger.info("  No correctable anomalies remain, stopping early")
+                iterations_used = iteration + 1
+                break
+
             # Apply corrections to trades
-            trades = self._apply_corrections(trades, corrections)
+            frame = self._apply_corrections(frame, corrections)
+        else:
+            # Out of iterations: only the last pass's corrections are unchecked
+            if anomalies is None:  # max_iterations=0
+                anomalies = check(frame)
+            else:
+                anomalies = self._recheck(frame, check, anomalies, changed)
 
         # Failed after max iterations
-        remaining = self._run_checks(trades, tolerance)
+        remaining = anomalies
         suggestions = self._generate_suggestions(remaining)
 
         result = ValidationResult(
             status="failed",
             run_id=run_id,
-            total_checked=len(trades),
+            total_checked=len(frame),
             anomalies=remaining,
             corrections=all_corrections,
             suggestions=suggestions,
-            iterations_used=max_iter,
+            iterations_used=iterations_used,
         )
 
         logger.warning(
-            f"Validation FAILED for run {run_id} after {max_iter} iterations. "
+            f"Validation FAILED for run {run_id} after {iterations_used} iterations. "
             f"{len(remaining)} unresolved anomalies."
         )
 
@@ -170,39 +332,136 @@ class ValidateAgent:
             logger.error(f"Failed to fetch trades: {e}")
             return []
 
-    def _run_checks(self, trades: List[Dict], tolerance: float) -> List[Dict]:
-        """Run all validation checks on trades."""
-        anomalies = []
+    def _to_frame(self, trades: List[Dict]) -> pd.DataFrame:
+        """Trades as columns (one row per trade, in order).
 
-        for idx, trade in enumerate(trades):
-            trade_anomalies = []
+        Resolves the ticker/symbol and shares/qty aliases once, parses
+        entry/exit times to UTC (NaT if missing), and loads prices and P&L
+        as float64 with NaN for missing values. Checks then read columns
+        directly instead of probing each dict.
+        """
+        return pd.DataFrame({
+            "symbol": [t.get("ticker") or t.get("symbol") or "" for t in trades],
+            "entry_time": self._utc_times(pd.Series([t.get("entry_time") or None for t in trades],
+                                                    dtype=object)),
+            "exit_time": self._utc_times(pd.Series([t.get("exit_time") or None for t in trades],
+                                                   dtype=object)),
+            "entry_price": _float_column([t.get("entry_price") for t in trades]),
+            "exit_price": _float_column([t.get("exit_price") for t in trades]),
+            "shares": _float_column([t["shares"] if "shares" in t else t.get("qty") for t in trades]),
+            "pnl": _float_column([t.get("pnl") for t in trades]),
+            "total_fees": np.nan_to_num(_float_column([t.get("total_fees", 0) for t in trades])),
+            "hit_target": [bool(t.get("hit_target", False)) for t in trades],
+            "hit_stop": [bool(t.get("hit_stop", False)) for t in trades],
+        })
+
+    def _build_checker(self, tolerance: float) -> Callable[[pd.DataFrame], List[Dict]]:
+        """Bind this run's config into one fused check over the trade columns.
+
+        The returned `check(frame)` runs the price tolerance, P&L math,
+        market hours, weekend and TP/SL checks in a single function body:
+        each column is read once into a local and every mask is computed
+        from those locals. `frame` may be a row subset; anomalies carry the
+        original trade positions.
+        """
+        lo, hi, window_label = _MARKET_WINDOWS[bool(self.extended_hours)]
+        prefetch, market_prices = self._prefetch_day_bars, self._market_prices
+
+        def check(frame: pd.DataFrame) -> List[Dict]:
+            symbols = frame["symbol"].to_numpy()
+            times = {field: pd.DatetimeIndex(frame[field]) for field in _TIME_FIELDS}
+            entry = frame["entry_price"].to_numpy()
+            exit_p = frame["exit_price"].to_numpy()
+            pnl = frame["pnl"].to_numpy()
+            prefetch(symbols, times)
+            issues = []
 
             # 1. Price tolerance check against market data
-            price_issues = self._check_price_tolerance(trade, tolerance)
-            trade_anomalies.extend(price_issues)
+            for field, recorded, time_field in (("entry_price", entry, "entry_time"),
+                                                ("exit_price", exit_p, "exit_time")):
+                actual = market_prices(symbols, times[time_field])
+                diff, flagged = _price_deviation(recorded, actual, tolerance)
+                label = "Entry price" if field == "entry_price" else "Exit price"
+                for i in np.flatnonzero(flagged):
+                    issues.append({
+                        "type": "price_tolerance",
+                        "trade_index": int(i),
+                        "field": field,
+                        "recorded": float(recorded[i]),
+                        "actual": float(actual[i]),
+                        "diff_pct": float(diff[i]) * 100,
+                        "message": f"{label} ${recorded[i]} differs from market ${actual[i]:.2f} by {diff[i]*100:.1f}%",
+                    })
 
             # 2. P&L math validation
-            pnl_issues = self._check_pnl_math(trade)
-            trade_anomalies.extend(pnl_issues)
-
-            # 3. Market hours check
-            hours_issues = self._check_market_hours(trade)
-            trade_anomalies.extend(hours_issues)
+            expected, mismatch = _pnl_mismatch(
+                entry, exit_p, frame["shares"].to_numpy(), frame["total_fees"].to_numpy(), pnl, 0.01)
+            for i in np.flatnonzero(mismatch):
+                issues.append({
+                    "type": "pnl_math",
+                    "trade_index": int(i),
+                    "expected_pnl": float(expected[i]),
+                    "recorded_pnl": float(pnl[i]),
+                    "message": f"P&L mismatch: expected ${expected[i]:.2f}, recorded ${pnl[i]:.2f}",
+                })
 
-            # 4. Weekend check
-            weekend_issues = self._check_weekends(trade)
-            trade_anomalies.extend(weekend_issues)
+            # 3./4. Market hours and weekends from one ET wall-clock conversion
+            # per field (int64 ns; missing times stay _NAT)
+            clock = {}
+            for field, t in times.items():
+                wall_ns = t.tz_convert(EASTERN).tz_localize(None).asi8
+                valid = wall_ns != _NAT
+                minutes = wall_ns // _NS_PER_MINUTE % 1440
+                weekday = (wall_ns // _NS_PER_DAY + 3) % 7  # 1970-01-01 was a Thursday
+                clock[field] = (minutes, valid & ((minutes < lo) | (minutes > hi)),
+                                weekday, valid & (weekday >= 5))
+            for field, (minutes, outside, _, _) in clock.items():
+                for i in np.flatnonzero(outside):
+                    hour, minute = divmod(int(minutes[i]), 60)
+                    issues.append({
+                        "type": "market_hours",
+                        "trade_index": int(i),
+                        "field": field,
+                        "hour_et": hour,
+                        "message": f"{field} at {hour:02d}:{minute:02d} ET is outside {window_label} window",
+                    })
+            for field, (_, _, weekday, weekend) in clock.items():
+                for i in np.flatnonzero(weekend):
+                    day_name = calendar.day_name[weekday[i]]
+                    issues.append({
+                        "type": "weekend_trade",
+                        "trade_index": int(i),
+                        "field": field,
+                        "day": day_name,
+                        "message": f"{field} on {day_name} (weekend)",
+                    })
 
             # 5. TP/SL logic check
-            tpsl_issues = self._check_tp_sl_logic(trade)
-            trade_anomalies.extend(tpsl_issues)
+            conflict = frame["hit_target"].to_numpy() & frame["hit_stop"].to_numpy()
+            for i in np.flatnonzero(conflict):
+                issues.append({
+                    "type": "tp_sl_conflict",
+                    "trade_index": int(i),
+                    "message": "Both take profit and stop loss marked as hit",
+                })
 
-            for issue in trade_anomalies:
-                issue["trade_index"] = idx
-                issue["symbol"] = trade.get("ticker") or trade.get("symbol", "")
-                anomalies.append(issue)
+            # Each check emits in trade order; a stable sort groups them per
+            # trade while keeping the check order within a trade.
+            issues.sort(key=lambda issue: issue["trade_index"])
+            positions = frame.index.to_numpy()  # differs from 0..n-1 for a row subset
+            for issue in issues:
+                issue["symbol"] = symbols[issue["trade_index"]]
+                issue["trade_index"] = int(positions[issue["trade_index"]])
+            return issues
 
-        return anomalies
+        return check
+
+    def _recheck(self, frame: pd.DataFrame, check: Callable[[pd.DataFrame], List[Dict]],
+                 anomalies: List[Dict], changed: set) -> List[Dict]:
+        """Re-run `check` for the `changed` trades, keep the rest as-is."""
+        kept = [a for a in anomalies if a["trade_index"] not in changed]
+        rechecked = check(frame.iloc[sorted(changed)])
+        return sorted(kept + rechecked, key=lambda issue: issue["trade_index"])
 
     def check_summary_metrics(self, metrics: Dict, trades: List[Dict],
                               initial_capital: float, start_date, end_date) -> List[Dict]:
@@ -277,170 +536,116 @@ class ValidateAgent:
 
         return anomalies
 
-    def _check_price_tolerance(self, trade: Dict, tolerance: float) -> List[Dict]:
-        """Check recorded prices against actual market data."""
-        issues = []
-        symbol = trade.get("ticker") or trade.get("symbol")
-        if not symbol:
-            return issues
-
-        # Check entry price
-        entry_time = trade.get("entry_time")
-        entry_price = trade.get("entry_price")
-        if entry_time and entry_price:
-            actual = self._get_market_price(symbol, entry_time)
-            if actual is not None:
-                diff = abs(float(entry_price) - actual) / actual
-                if diff > tolerance:
-                    issues.append({
-                        "type": "price_tolerance",
-                        "field": "entry_price",
-                        "recorded": float(entry_price),
-                        "actual": actual,
-                        "diff_pct": diff * 100,
-                        "message": f"Entry price ${entry_price} differs from market ${actual:.2f} by {diff*100:.1f}%",
-                    })
-
-        # Check exit price
-        exit_time = trade.get("exit_time")
-        exit_price = trade.get("exit_price")
-        if exit_time and exit_price:
-            actual = self._get_market_price(symbol, exit_time)
-            if actual is not None:
-                diff = abs(float(exit_price) - actual) / actual
-                if diff > tolerance:
-                    issues.append({
-                        "type": "price_tolerance",
-                        "field": "exit_price",
-                        "recorded": float(exit_price),
-                        "actual": actual,
-                        "diff_pct": diff * 100,
-                        "message": f"Exit price ${exit_price} differs from market ${actual:.2f} by {diff*100:.1f}%",
-                    })
-
-        return issues
-
-    def _check_pnl_math(self, trade: Dict) -> List[Dict]:
-        """Verify P&L calculations."""
-        issues = []
-        entry = trade.get("entry_price")
-        exit_p = trade.get("exit_price")
-        shares = trade.get("shares", trade.get("qty"))
-        recorded_pnl = trade.get("pnl")
-        total_fees = trade.get("total_fees", 0)
-
-        if all(v is not None for v in [entry, exit_p, shares, recorded_pnl]):
-            expected = (float(exit_p) - float(entry)) * float(shares) - float(total_fees)
-            if not np.isclose(float(recorded_pnl), expected, atol=0.01):
-                issues.append({
-                    "type": "pnl_math",
-                    "expected_pnl": expected,
-                    "recorded_pnl": float(recorded_pnl),
-                    "message": f"P&L mismatch: expected ${expected:.2f}, recorded ${float(recorded_pnl):.2f}",
-                })
-
-        return issues
-
-    def _check_market_hours(self, trade: Dict) -> List[Dict]:
-        """Check that trades occurred during market hours."""
-        issues = []
-
-        for field in ["entry_time", "exit_time"]:
-            time_val = trade.get(field)
-            if not time_val:
-                continue
-
-            try:
-                dt = self._parse_datetime(time_val)
-                et = dt.astimezone(EASTERN)
-                hour_float = et.hour + et.minute / 60.0
-
-                if self.extended_hours:
-                    # Extended: 4:00 AM - 8:00 PM ET
-                    in_window = 4.0 <= hour_float <= 20.0
-                    window_label = "4AM-8PM"
-                else:
-                    # Regular: 9:30 AM - 4:00 PM ET (inclusive of close)
-                    in_window = 9.5 <= hour_float <= 16.0
-                    window_label = "9:30AM-4PM"
-
-                if not in_window:
-                    issues.append({
-                        "type": "market_hours",
-                        "field": field,
-                        "hour_et": et.hour,
-                        "message": f"{field} at {et.strftime('%H:%M')} ET is outside {window_label} window",
-                    })
-            except Exception:
-                pass
-
-        return issues
-
-    def _check_weekends(self, trade: Dict) -> List[Dict]:
-        """Check for weekend trades."""
-        issues = []
-
-        for field in ["entry_time", "exit_time"]:
-            time_val = trade.get(field)
-            if not time_val:
-                continue
-
-            try:
-                dt = self._parse_datetime(time_val)
-                et = dt.astimezone(EASTERN)
-                if et.weekday() >= 5:
-                    day_name = et.strftime("%A")
-                    issues.append({
-                        "type": "weekend_trade",
-                        "field": field,
-                        "day": day_name,
-                        "message": f"{field} on {day_name} (weekend)",
-                    })
-            except Exception:
-                pass
-
-        return issues
-
-    def _check_tp_sl_logic(self, trade: Dict) -> List[Dict]:
-        """Check take profit / stop loss logic consistency."""
-        issues = []
-        hit_tp = trade.get("hit_target", False)
-        hit_sl = trade.get("hit_stop", False)
-
-        if hit_tp and hit_sl:
-            issues.append({
-                "type": "tp_sl_conflict",
-                "message": "Both take profit and stop loss marked as hit",
-            })
+    def _utc_times(self, values: pd.Series) -> pd.DatetimeIndex:
+        """Parse a timestamp column to UTC; missing or unparseable -> NaT."""
+        present = values.notna().to_numpy()
+        # Sniff the first value once to pick the parser for the whole column:
+        # the C ISO-8601 path, or pandas' per-element dateutil parsing.
+        first = values.iat[int(present.argmax())] if present.any() else None
+        fmt = "mixed" if isinstance(first, str) and not _ISO_RE.match(first) else "ISO8601"
+        times = pd.DatetimeIndex(
+            pd.to_datetime(values, utc=True, errors="coerce", format=fmt))
+        # Non-ISO strings are rare; give them the scalar (dateutil) parser.
+        retry = np.flatnonzero(times.isna() & present)
+        if len(retry):
+            fixed = list(times)
+            for i in retry:
+                try:
+                    fixed[i] = pd.Timestamp(self._parse_datetime(values.iat[i])).tz_convert("UTC")
+                except (ValueError, OverflowError):
+                    pass
+            times = pd.DatetimeIndex(fixed, tz="UTC")
+        return times.as_unit("ns")  # asi8 below is in nanoseconds
 
-        return issues
+    @staticmethod
+    def _symbol_days(symbols: np.ndarray, times: pd.DatetimeIndex) -> Dict[Tuple[str, str], np.ndarray]:
+        """Group trade positions by (symbol, UTC day ISO string)."""
+        valid = np.flatnonzero(~times.isna() & (symbols != ""))
+        if not len(valid):
+            return {}
+        day_num = times.asi8[valid] // _NS_PER_DAY
+        groups = pd.DataFrame({"symbol": symbols[valid], "day": day_num}).groupby(
+            ["symbol", "day"]).indices
+        return {
+            (symbol, (_EPOCH_DAY + pd.Timedelta(days=int(day))).date().isoformat()): valid[pos]
+            for (symbol, day), pos in groups.items()
+        }
 
-    def _get_market_price(self, symbol: str, timestamp) -> Optional[float]:
-        """Fetch actual market price at a given timestamp."""
+    def _prefetch_day_bars(self, symbols: np.ndarray, times: Dict[str, pd.DatetimeIndex]):
+        """Load bars for every (symbol, UTC day) the trades touch, once each."""
+        symbol_days = set()
+        for field_times in times.values():
+            symbol_days.update(self._symbol_days(symbols, field_times))
+        # Today's bars are never cached, so prefetching them would be wasted.
+        today = _utc_today()
+        symbol_days = {sd for sd in symbol_days if sd[1] < today}
+
+        # Fetches are independent network calls. yf.download keeps
+        # module-level state, so only the Alpaca feed is fetched concurrently.
+        workers = min(self.prefetch_workers, len(symbol_days))
+        if workers > 1 and getattr(self.market_data, "provider", None) == "alpaca":
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(lambda sd: self._get_day_bars(*sd), symbol_days))
+        else:
+            for symbol, day in symbol_days:
+                self._get_day_bars(symbol, day)
+
+    def _get_day_bars(self, symbol: str, day: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Bars for one (symbol, UTC day), cached for the current run.
+
+        Empty results (no data or a failed fetch) and the current day, whose
+        bars are still arriving, are not cached and are fetched again.
+        """
+        key = (symbol, day)
+        bars = self._day_bars.get(key)
+        if bars is None:
+            bars = self._fetch_day_bars(symbol, day)
+            if len(bars[0]) and day < _utc_today():
+                self._day_bars[key] = bars
+        return bars
+
+    def _fetch_day_bars(self, symbol: str, day: str) -> Tuple[np.ndarray, np.ndarray]:
+        """1-minute bars for one UTC day as sorted (UTC ns, close) arrays.
+
+        Uncached; go through `_get_day_bars`. Empty arrays mean no data.
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
         try:
-            dt = self._parse_datetime(timestamp)
-            data = self.market_data.get_intraday_prices(symbol, dt, interval="1")
+            start = datetime.fromisoformat(day).replace(tzinfo=timezone.utc)
+            data = self.market_data.get_intraday_prices(symbol, start, interval="1")
             if data.empty:
-                return None
-
-            # Find closest bar to the timestamp
-            if hasattr(data.index, "tz_localize"):
-                try:
-                    data.index = data.index.tz_localize("UTC")
-                except TypeError:
-                    pass
-
-            # Get the close price of the nearest bar
-            closest_idx = data.index.get_indexer([dt], method="nearest")[0]
-            if 0 <= closest_idx < len(data):
-                val = data["Close"].iloc[closest_idx]
-                return float(val.iloc[0]) if hasattr(val, "iloc") else float(val)
-            return None
+                return empty
+            index = pd.DatetimeIndex(data.index)
+            if index.tz is None:
+                index = index.tz_localize("UTC")
+            close = data["Close"]
+            if isinstance(close, pd.DataFrame):
+                close = close.iloc[:, 0]
         except Exception as e:
-            logger.debug(f"Could not fetch market price for {symbol} at {timestamp}: {e}")
-            return None
-
-    def _attempt_corrections(self, trades: List[Dict],
+            logger.debug(f"Could not fetch bars for {symbol} on {day}: {e}")
+            return empty
+        ts_ns = index.as_unit("ns").asi8  # epoch ns (UTC) regardless of the index timezone
+        order = np.argsort(ts_ns, kind="stable")
+        return ts_ns[order], close.to_numpy(dtype=np.float64)[order]
+
+    def _market_prices(self, symbols: np.ndarray, times: pd.DatetimeIndex) -> np.ndarray:
+        """Close of the nearest bar for each trade; NaN where there is no data."""
+        actual = np.full(len(times), np.nan)
+        t_all = times.asi8
+        for (symbol, day), idx in self._symbol_days(symbols, times).items():
+            ts_ns, close = self._get_day_bars(symbol, day)
+            if not len(ts_ns):
+                continue
+            # Binary search, then pick the closer neighbour
+            t = t_all[idx]
+            right = np.searchsorted(ts_ns, t)
+            left = np.maximum(right - 1, 0)
+            right_c = np.minimum(right, len(ts_ns) - 1)
+            use_left = (right > 0) & ((right == len(ts_ns)) | (ts_ns[right_c] - t > t - ts_ns[left]))
+            actual[idx] = close[np.where(use_left, left, right_c)]
+        return actual
+
+    def _attempt_corrections(self, frame: pd.DataFrame,
                              anomalies: List[Dict]) -> List[Dict]:
         """Attempt to correct identified anomalies."""
         corrections = []
@@ -478,65 +683,49 @@ class ValidateAgent:
 
         return corrections
 
-    def _apply_corrections(self, trades: List[Dict],
-                           corrections: List[Dict]) -> List[Dict]:
-        """Apply corrections to trade data."""
-        trades = [dict(t) for t in trades]  # Copy
+    def _apply_corrections(self, frame: pd.DataFrame,
+                           corrections: List[Dict]) -> pd.DataFrame:
+        """Apply corrections to trade data, in place (returns `frame`)."""
+        prices: Dict[str, Dict[int, float]] = {}
+        new_pnl: Dict[int, float] = {}
 
         for corr in corrections:
             idx = corr.get("trade_index")
-            if idx is None or idx >= len(trades):
+            if idx is None or idx >= len(frame):
                 continue
 
             if corr["type"] == "pnl_recalculation":
-                trades[idx]["pnl"] = corr["new_pnl"]
+                new_pnl[idx] = corr["new_pnl"]
 
             elif corr["type"] == "price_correction":
-                field = corr["field"]
-                trades[idx][field] = corr["new_price"]
-                # Recalculate P&L if both prices are available
-                entry = trades[idx].get("entry_price")
-                exit_p = trades[idx].get("exit_price")
-                shares = trades[idx].get("shares", trades[idx].get("qty"))
-                fees = trades[idx].get("total_fees", 0)
-                if all(v is not None for v in [entry, exit_p, shares]):
-                    trades[idx]["pnl"] = (float(exit_p) - float(entry)) * float(shares) - float(fees)
-
-        return trades
+                prices.setdefault(corr["field"], {})[idx] = corr["new_price"]
+
+        # One vectorized assignment per column, touching only corrected rows
+        for field, values in prices.items():
+            frame.iloc[list(values), frame.columns.get_loc(field)] = list(values.values())
+
+        # Recalculate P&L where a price changed and both prices are available
+        repriced = sorted({idx for values in prices.values() for idx in values})
+        if repriced:
+            entry, exit_p, shares, fees = (
+                frame[col].to_numpy()[repriced]
+                for col in ("entry_price", "exit_price", "shares", "total_fees")
+            )
+            known = np.isfinite(entry) & np.isfinite(exit_p) & np.isfinite(shares)
+            rows = np.asarray(repriced)[known]
+            frame.iloc[rows, frame.columns.get_loc("pnl")] = ((exit_p - entry) * shares - fees)[known]
+
+        # Explicit P&L recalculations come after price corrections in the
+        # anomaly order, so they take precedence as before.
+        if new_pnl:
+            frame.iloc[list(new_pnl), frame.columns.get_loc("pnl")] = list(new_pnl.values())
+
+        return frame
 
     def _generate_suggestions(self, anomalies: List[Dict]) -> List[str]:
         """Generate human-readable suggestions for unresolvable anomalies."""
-        suggestions = []
         types = {a["type"] for a in anomalies}
-
-        if "weekend_trade" in types:
-            suggestions.append(
-                "Weekend trades detected. Check the data source for incorrect timestamps "
-                "or ensure the backtester skips weekends."
-            )
-        if "market_hours" in types:
-            suggestions.append(
-                "Trades outside market hours detected. Verify the data source provides "
-                "correct timestamps and that the strategy respects trading hours."
-            )
-        if "price_tolerance" in types:
-            suggestions.append(
-                "Significant price deviations from market data. This may indicate "
-                "stale price data or data feed issues. Consider re-running with a "
-                "different data source."
-            )
-        if "tp_sl_conflict" in types:
-            suggestions.append(
-                "Take profit and stop loss both triggered on the same trade. "
-                "Review the strategy exit logic for race conditions."
-            )
-        if "pnl_math" in types:
-            suggestions.append(
-                "P&L calculation mismatches remain after correction. Manually "
-                "verify the fee calculations and entry/exit prices."
-            )
-
-        return suggestions
+        return [msg for atype, msg in self._SUGGESTIONS.items() if atype in types]
 
     def _publish_result(self, result: ValidationResult):
         """Send validation result to message bus."""
@@ -553,16 +742,24 @@ class ValidateAgent:
         """Parse a datetime from various formats."""
         if isinstance(value, datetime):
             if value.tzinfo is None:
-                return pytz.utc.localize(value)
+                return value.replace(tzinfo=timezone.utc)
             return value
+        return ValidateAgent._parse_datetime_str(str(value))
 
-        s = str(value)
-        try:
-            dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
-        except ValueError:
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _parse_datetime_str(s: str) -> datetime:
+        """String parsing behind `_parse_datetime`, memoized per timestamp."""
+        dt = None
+        if _ISO_RE.match(s):  # skip the raise/catch for strings that can't be ISO
+            try:
+                dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+        if dt is None:
             from dateutil.parser import parse
             dt = parse(s)
 
         if dt.tzinfo is None:
-            dt = pytz.utc.localize(dt)
+            dt = dt.replace(tzinfo=timezone.utc)
         return dt
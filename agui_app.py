@@ -6,23 +6,34 @@ Center:     Chat (WebSocket streaming)
 Right:      Thinking trace / artifact canvas (toggled)
 
 Launch:  python agui_app.py          # port 5003
-         uvicorn agui_app:app --port 5003 --reload
+         AGUI_RELOAD=true python agui_app.py   # dev: reload on save
 """
 
 import os
 import sys
+import time
 import uuid as _uuid
+import hashlib
+import html
+import json
 import logging
+import re
+import secrets
+from collections import deque
+from functools import lru_cache, wraps
 from pathlib import Path
 from typing import Dict, Optional
 
 sys.path.insert(0, str(Path(__file__).parent.absolute()))
 
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from fasthtml.common import *
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.gzip import GZipMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -54,15 +65,38 @@ _GOOGLE_SVG = """<svg width="18" height="18" viewBox="0 0 18 18" xmlns="http://w
 </svg>"""
 
 from utils.agui import setup_agui, get_chat_styles, StreamingCommand, list_conversations
+from utils.auth import (
+    authenticate, create_user, get_user_accounts, get_user_by_email,
+    get_user_by_google_id, has_password, link_google_id, store_alpaca_keys,
+    update_display_name, update_password, verify_password,
+)
+from utils.db.db_pool import DatabasePool
+from utils.equity_chart import chart_json as _chart_json
+from sqlalchemy import text
 import threading
 
+try:
+    import rcssmin  # optional: minify the layout stylesheet at import
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin  # optional: minify the layout script at import
+except ImportError:
+    rjsmin = None
+
+try:
+    import brotli  # optional: pre-compressed layout assets
+except ImportError:
+    brotli = None
+
 # ---------------------------------------------------------------------------
 # LangGraph Agent with StructuredTool wrappers
 # ---------------------------------------------------------------------------
 
-from langchain_openai import ChatOpenAI
+# The chat model and ReAct graph are built by the AgentRuntime below, which
+# imports its own framework/provider modules on demand.
 from langchain_core.tools import StructuredTool
-from langgraph.prebuilt import create_react_agent
 
 SYSTEM_PROMPT = (
     "You are AlpaTrade, an AI trading assistant. "
@@ -100,6 +134,50 @@ SYSTEM_PROMPT = (
 )
 
 
+def _ttl_cached(ttl: float, maxsize: int = 512):
+    """Reuse a tool's result for identical arguments for ``ttl`` seconds.
+
+    Error strings are not cached, so a failed lookup is retried on the next call.
+    """
+    def decorator(func):
+        cache: Dict[tuple, tuple] = {}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                hit = cache.get(key)
+            if hit and (now - hit[1]) < ttl:
+                return hit[0]
+            result = func(*args, **kwargs)
+            if not (isinstance(result, str) and result.startswith("Error")):
+                with lock:
+                    if key not in cache and len(cache) >= maxsize:
+                        cache.pop(next(iter(cache)))  # oldest insertion
+                    cache[key] = (result, now)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+# Tool result lifetimes: quotes and movers go stale fast, company facts rarely.
+PRICE_TTL = 60
+NEWS_TTL = 15 * 60
+PROFILE_TTL = 24 * 60 * 60
+
+
+@lru_cache(maxsize=1)
+def _market_research():
+    """Shared MarketResearch instance (it only holds API keys read from env)."""
+    from utils.market_research_util import MarketResearch
+    return MarketResearch()
+
+
+@_ttl_cached(PRICE_TTL)
 def get_stock_price(ticker: str) -> str:
     """Get current stock price and recent performance for a ticker symbol."""
     try:
@@ -107,28 +185,30 @@ def get_stock_price(ticker: str) -> str:
         df = get_intraday_data(ticker.upper(), interval="1d", period="5d")
         if df.empty:
             return f"No price data found for {ticker.upper()}"
-        last = df.iloc[-1]
-        prev = df.iloc[-2] if len(df) > 1 else last
-        change = last["Close"] - prev["Close"]
-        pct = (change / prev["Close"]) * 100
+        # Last two rows as one float block instead of two row Series.
+        rows = df[["Open", "High", "Low", "Close", "Volume"]].to_numpy(dtype=float)[-2:]
+        open_, high, low, close, volume = rows[-1]
+        prev_close = rows[0][3]
+        change = close - prev_close
+        pct = (change / prev_close) * 100
         sign = "+" if change >= 0 else ""
         return (
-            f"**{ticker.upper()}** — ${last['Close']:.2f} "
+            f"**{ticker.upper()}** — ${close:.2f} "
             f"({sign}{change:.2f}, {sign}{pct:.2f}%)\n"
-            f"Open: ${last['Open']:.2f} | High: ${last['High']:.2f} | "
-            f"Low: ${last['Low']:.2f} | Vol: {int(last['Volume']):,}"
+            f"Open: ${open_:.2f} | High: ${high:.2f} | "
+            f"Low: ${low:.2f} | Vol: {int(volume):,}"
         )
     except Exception as e:
         return f"Error fetching price for {ticker}: {e}"
 
 
 
+@_ttl_cached(NEWS_TTL)
 def get_stock_news(ticker: str, limit: int = 5) -> str:
     """Get latest news headlines for a stock ticker."""
     try:
-        from utils.market_research_util import MarketResearch
         from engine.config import get_settings
-        mr = MarketResearch()
+        mr = _market_research()
         # Honour the configured SEARCH_PROVIDER (defaults to Tavily, which returns
         # real fresh article links). Unknown providers fall back to the default order.
         sp = (get_settings().search_provider or "tavily").lower()
@@ -139,62 +219,61 @@ def get_stock_news(ticker: str, limit: int = 5) -> str:
 
 
 
+@_ttl_cached(NEWS_TTL)
 def get_analyst_ratings(ticker: str) -> str:
     """Get analyst ratings and price targets for a stock."""
     try:
-        from utils.market_research_util import MarketResearch
-        mr = MarketResearch()
+        mr = _market_research()
         return mr.analysts(ticker=ticker.upper())
     except Exception as e:
         return f"Error fetching ratings for {ticker}: {e}"
 
 
 
+@_ttl_cached(PROFILE_TTL)
 def get_company_profile(ticker: str) -> str:
     """Get company profile, sector, and key details for a stock."""
     try:
-        from utils.market_research_util import MarketResearch
-        mr = MarketResearch()
+        mr = _market_research()
         return mr.profile(ticker=ticker.upper())
     except Exception as e:
         return f"Error fetching profile for {ticker}: {e}"
 
 
 
+@_ttl_cached(PROFILE_TTL)
 def get_financials(ticker: str, period: str = "annual") -> str:
     """Get financial data (revenue, earnings, margins) for a stock. Period: 'annual' or 'quarterly'."""
     try:
-        from utils.market_research_util import MarketResearch
-        mr = MarketResearch()
+        mr = _market_research()
         return mr.financials(ticker=ticker.upper(), period=period)
     except Exception as e:
         return f"Error fetching financials for {ticker}: {e}"
 
 
 
+@_ttl_cached(PRICE_TTL)
 def get_market_movers(direction: str = "both") -> str:
     """Get today's top market movers (gainers and losers). Direction: 'gainers', 'losers', or 'both'."""
     try:
-        from utils.market_research_util import MarketResearch
-        mr = MarketResearch()
+        mr = _market_research()
         return mr.movers(direction=direction)
     except Exception as e:
         return f"Error fetching market movers: {e}"
 
 
 
+@_ttl_cached(NEWS_TTL)
 def get_valuation(tickers: str) -> str:
     """Compare valuation metrics (P/E, P/B, EV/EBITDA) for multiple stocks. Pass comma-separated tickers like 'AAPL,MSFT,GOOGL'."""
     try:
-        import re
-        from utils.market_research_util import MarketResearch
         _stop = {"AND", "OR", "VS", "VERSUS", "THE", "WITH", "COMPARE", "TO"}
         syms = [t for t in re.split(r"[,\s]+", (tickers or "").upper())
                 if t and t not in _stop]
         if not syms:
             return "Please provide one or more tickers, e.g. AAPL,MSFT,GOOGL."
         # valuation() expects a LIST — passing a string makes it iterate characters.
-        return MarketResearch().valuation(tickers=syms)
+        return _market_research().valuation(tickers=syms)
     except Exception as e:
         return f"Error fetching valuation: {e}"
 
@@ -339,7 +418,6 @@ def analyze_prediction_correlation(industry: str = "", event: str = "",
     The calling user's configured provider interprets the deterministic data.
     """
     try:
-        import json
         from engine.research.data import correlation_summary
         data = correlation_summary(industry, event, min_samples)
         corr = data["correlation"]
@@ -530,36 +608,47 @@ def place_paper_order(symbol: str, qty: float, side: str = "buy",
         return f"Order failed: {msg}"
 
 
+# Tool queries are built once; SQLAlchemy caches the compiled form per clause.
+_ACCOUNTS_SQL = text("""
+    SELECT ua.account_name, ua.account_id, ua.created_at
+    FROM alpatrade.user_accounts ua
+    WHERE ua.is_active = TRUE
+    ORDER BY ua.created_at ASC
+    LIMIT 20
+""")
+_TRADES_QUERY = """
+    SELECT symbol, direction, shares, entry_price, exit_price,
+           pnl, pnl_pct, trade_type
+    FROM alpatrade.trades
+    {where}
+    ORDER BY created_at DESC LIMIT :lim
+"""
+_ALL_TRADES_SQL = text(_TRADES_QUERY.format(where=""))
+_TYPED_TRADES_SQL = text(_TRADES_QUERY.format(where="WHERE trade_type = :trade_type"))
+_RUNS_SQL = text("""
+    SELECT run_id, mode, strategy, status, started_at
+    FROM alpatrade.runs
+    ORDER BY created_at DESC LIMIT :lim
+""")
+
 
 def list_user_accounts() -> str:
     """List all Alpaca brokerage accounts linked to the current user. Shows account name, API key hint, and status."""
     try:
-        from utils.auth import get_user_accounts
         # Use a placeholder — the interceptor will inject the real user_id
         # This tool is mainly for the AI to describe what accounts exist
-        from utils.db.db_pool import DatabasePool
-        from sqlalchemy import text
         pool = DatabasePool()
         with pool.get_session() as session:
-            result = session.execute(
-                text("""
-                    SELECT ua.account_name, ua.account_id, ua.created_at
-                    FROM alpatrade.user_accounts ua
-                    WHERE ua.is_active = TRUE
-                    ORDER BY ua.created_at ASC
-                    LIMIT 20
-                """)
-            )
-            rows = result.fetchall()
+            result = session.execute(_ACCOUNTS_SQL)
+            rows = result.all()
         if not rows:
             return "No accounts found. Use `account:add <API_KEY> <SECRET_KEY>` to add one."
         md = "**Your Alpaca Accounts**\n\n"
         md += "| # | Name | Account ID | Added |\n"
         md += "|---|------|------------|-------|\n"
-        for i, r in enumerate(rows, 1):
-            created = str(r[2])[:10] if r[2] else "-"
-            short_id = str(r[1])[:8]
-            md += f"| {i} | {r[0]} | `{short_id}` | {created} |\n"
+        for i, (name, account_id, created_at) in enumerate(rows, 1):
+            created = str(created_at)[:10] if created_at else "-"
+            md += f"| {i} | {name} | `{str(account_id)[:8]}` | {created} |\n"
         md += f"\n*{len(rows)} accounts*\n"
         md += "\nUse `account:switch <number>` to change active account."
         return md
@@ -598,45 +687,68 @@ def show_running_agents() -> str:
 def show_recent_trades(limit: int = 20, trade_type: str = "") -> str:
     """Show recent trades from the AlpaTrade database. Use trade_type='paper' or 'backtest' to filter."""
     try:
-        from utils.db.db_pool import DatabasePool
-        from sqlalchemy import text
         pool = DatabasePool()
         with pool.get_session() as session:
-            where = ""
-            bind = {"lim": limit}
             if trade_type:
-                where = "WHERE trade_type = :trade_type"
-                bind["trade_type"] = trade_type
-            result = session.execute(
-                text(f"""
-                    SELECT symbol, direction, shares, entry_price, exit_price,
-                           pnl, pnl_pct, trade_type
-                    FROM alpatrade.trades
-                    {where}
-                    ORDER BY created_at DESC LIMIT :lim
-                """),
-                bind,
-            )
-            rows = result.fetchall()
+                result = session.execute(
+                    _TYPED_TRADES_SQL, {"lim": limit, "trade_type": trade_type},
+                )
+            else:
+                result = session.execute(_ALL_TRADES_SQL, {"lim": limit})
+            rows = result.all()
         if not rows:
             label = f" ({trade_type})" if trade_type else ""
             return f"No trades{label} found in database."
         label = f" ({trade_type})" if trade_type else ""
-        md = f"**Trades{label}**\n\n"
-        md += "| Symbol | Dir | Shares | Entry | Exit | P&L | P&L% | Type |\n"
-        md += "|--------|-----|--------|-------|------|-----|------|------|\n"
-        for r in rows:
-            md += (
-                f"| {r[0]} | {r[1]} | {float(r[2] or 0):.0f} | "
-                f"${float(r[3] or 0):.2f} | ${float(r[4] or 0):.2f} | "
-                f"${float(r[5] or 0):.2f} | {float(r[6] or 0):.2f}% | {r[7]} |\n"
+        lines = [
+            f"**Trades{label}**",
+            "",
+            "| Symbol | Dir | Shares | Entry | Exit | P&L | P&L% | Type |",
+            "|--------|-----|--------|-------|------|-----|------|------|",
+        ]
+        for symbol, direction, shares, entry, exit_, pnl, pnl_pct, kind in rows:
+            lines.append(
+                f"| {symbol} | {direction} | {float(shares or 0):.0f} | "
+                f"${float(entry or 0):.2f} | ${float(exit_ or 0):.2f} | "
+                f"${float(pnl or 0):.2f} | {float(pnl_pct or 0):.2f}% | {kind} |"
             )
-        return md + f"\n*{len(rows)} trades shown*"
+        lines += ["", f"*{len(rows)} trades shown*"]
+        return "\n".join(lines)
     except Exception as e:
         return f"Error fetching trades: {e}"
 
 
 
+# Candles beyond this are merged before shipping; Plotly slows down well past
+# it and the extra bars are sub-pixel at chat width anyway.
+MAX_CHART_POINTS = 2000
+
+
+def _downsample_ohlc(dates: list, ohlc, volume, max_points: int = MAX_CHART_POINTS):
+    """Merge consecutive candles into at most ``max_points`` buckets.
+
+    Each bucket keeps its first date and open, the max high, the min low, the
+    last close and the summed volume, so the chart's range is preserved.
+    ``ohlc`` is a (4, n) array of open/high/low/close rows.
+    """
+    n = len(dates)
+    if n <= max_points:
+        return dates, ohlc, volume
+    step = -(-n // max_points)
+    starts = np.arange(0, n, step)
+    ends = np.minimum(starts + step, n) - 1
+    opens, highs, lows, closes = ohlc
+    merged = np.stack([
+        opens[starts],
+        np.maximum.reduceat(highs, starts),
+        np.minimum.reduceat(lows, starts),
+        closes[ends],
+    ])
+    if len(volume):
+        volume = np.add.reduceat(volume, starts)
+    return [dates[i] for i in starts], merged, volume
+
+
 def show_stock_chart(ticker: str, period: str = "3mo") -> str:
     """Show a candlestick price chart (with volume) for a stock.
     Period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y."""
@@ -647,18 +759,21 @@ def show_stock_chart(ticker: str, period: str = "3mo") -> str:
         if df.empty:
             return f"No chart data for {ticker.upper()}"
         dates = [d.isoformat() if hasattr(d, 'isoformat') else str(d) for d in df.index]
-        _r = lambda s: [round(float(v), 2) for v in df[s]]  # noqa: E731
-        vols = [int(v) for v in df["Volume"]] if "Volume" in df else []
-        import json
-        chart_data = json.dumps({
+        # One rounded float64 block for all four price columns, one row per
+        # column; rows of a C-contiguous array serialize straight from NumPy.
+        ohlc = df[["Open", "High", "Low", "Close"]].to_numpy(dtype=float).T.round(2)
+        vols = df["Volume"].astype("int64").to_numpy() if "Volume" in df else []
+        dates, ohlc, vols = _downsample_ohlc(dates, ohlc, vols)
+        opens, highs, lows, closes = np.ascontiguousarray(ohlc)
+        chart_data = _chart_json({
             "type": "candlestick",
             "ticker": ticker.upper(),
             "period": period,
             "dates": dates,
-            "open": _r("Open"),
-            "high": _r("High"),
-            "low": _r("Low"),
-            "close": _r("Close"),
+            "open": opens,
+            "high": highs,
+            "low": lows,
+            "close": closes,
             "volume": vols,
         })
         return (f"📈 Here is the **{ticker.upper()}** {period} candlestick chart, rendered below.\n\n"
@@ -674,7 +789,6 @@ def show_market_map(period: str = "1mo") -> str:
     Period: 1d, 5d, 1mo, 3mo, 6mo, 1y, ytd."""
     try:
         from engine.market_map import market_map_data
-        import json
         d = market_map_data(period)
         if d.get("error") or not d.get("stocks"):
             return f"Couldn't build the market map right now ({d.get('error', 'no data')})."
@@ -696,7 +810,6 @@ def compare_stocks(tickers: str, period: str = "6mo") -> str:
     `tickers` is a comma/space-separated list (e.g. 'AAPL, MSFT, NVDA').
     Period: 1mo, 3mo, 6mo, 1y, 2y, 5y, ytd."""
     try:
-        import re, json
         from utils.data_loader import get_intraday_data
         syms = [t for t in re.split(r"[,\s]+", (tickers or "").upper()) if t][:8]
         if not syms:
@@ -706,9 +819,9 @@ def compare_stocks(tickers: str, period: str = "6mo") -> str:
             df = get_intraday_data(sym, interval="1d", period=period)
             if df.empty or len(df) < 2:
                 continue
-            closes = [float(c) for c in df["Close"]]
+            closes = df["Close"].to_numpy(dtype=float)
             base = closes[0] or closes[-1]
-            pct = [round((c - base) / base * 100.0, 2) for c in closes]
+            pct = ((closes - base) / base * 100.0).round(2)
             dates = [d.isoformat() if hasattr(d, "isoformat") else str(d) for d in df.index]
             series.append({"name": sym, "dates": dates, "pct": pct})
             summary.append((sym, pct[-1]))
@@ -716,7 +829,7 @@ def compare_stocks(tickers: str, period: str = "6mo") -> str:
             return f"No data for {', '.join(syms)}."
         summary.sort(key=lambda x: x[1], reverse=True)
         line = ", ".join(f"**{s}** {p:+.1f}%" for s, p in summary)
-        chart_data = json.dumps({"type": "compare", "period": period, "series": series})
+        chart_data = _chart_json({"type": "compare", "period": period, "series": series})
         return (f"📊 **{period} return comparison** — {line}. Rendered below.\n\n"
                 f"__CHART_DATA__{chart_data}__END_CHART__")
     except Exception as e:  # noqa: BLE001
@@ -727,28 +840,23 @@ def compare_stocks(tickers: str, period: str = "6mo") -> str:
 def show_recent_runs(limit: int = 20) -> str:
     """Show recent backtest/paper trade runs from the AlpaTrade database."""
     try:
-        from utils.db.db_pool import DatabasePool
-        from sqlalchemy import text
         pool = DatabasePool()
         with pool.get_session() as session:
-            result = session.execute(
-                text("""
-                    SELECT run_id, mode, strategy, status, started_at
-                    FROM alpatrade.runs
-                    ORDER BY created_at DESC LIMIT :lim
-                """),
-                {"lim": limit},
-            )
-            rows = result.fetchall()
+            result = session.execute(_RUNS_SQL, {"lim": limit})
+            rows = result.all()
         if not rows:
             return "No runs found in database."
-        md = "| Run ID | Mode | Strategy | Status | Started |\n"
-        md += "|--------|------|----------|--------|---------|\n"
-        for r in rows:
-            short_id = str(r[0])[:8]
-            started = str(r[4])[:19] if r[4] else "-"
-            md += f"| `{short_id}` | {r[1]} | {r[2] or '-'} | {r[3]} | {started} |\n"
-        return md + f"\n*{len(rows)} runs shown*"
+        lines = [
+            "| Run ID | Mode | Strategy | Status | Started |",
+            "|--------|------|----------|--------|---------|",
+        ]
+        for run_id, mode, strategy, status, started_at in rows:
+            started = str(started_at)[:19] if started_at else "-"
+            lines.append(
+                f"| `{str(run_id)[:8]}` | {mode} | {strategy or '-'} | {status} | {started} |"
+            )
+        lines += ["", f"*{len(rows)} runs shown*"]
+        return "\n".join(lines)
     except Exception as e:
         return f"Error fetching runs: {e}"
 
@@ -940,16 +1048,36 @@ def clear_agent_cache() -> None:
 # FastHTML app
 # ---------------------------------------------------------------------------
 
+# Sessions are signed with JWT_SECRET, read once at startup. Without it each
+# process signs with its own random key: cookies can't be forged, but every
+# restart logs everyone out, so deployments must set it.
+JWT_SECRET = os.getenv("JWT_SECRET")
+if not JWT_SECRET:
+    logger.warning("JWT_SECRET not set — using a random per-process secret; sessions "
+                   "will not survive a restart. Run: python scripts/generate_keys.py")
+    JWT_SECRET = secrets.token_hex(32)
+elif len(JWT_SECRET) < 32:
+    logger.warning("JWT_SECRET is shorter than 32 characters; generate a stronger one")
+
 app, rt = fast_app(
     exts="ws",
-    secret_key=os.getenv("JWT_SECRET", os.urandom(32).hex()),
+    secret_key=JWT_SECRET,
     hdrs=[
+        # Loaded synchronously: the chat widget's inline script checks
+        # window.marked while the page is parsing.
         Script(src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"),
-        Script(src="https://cdn.plot.ly/plotly-2.35.2.min.js"),
         Script(src="/static/voice.js"),
     ],
 )
 
+# Plotly is ~3.5 MB and only the chat page draws charts, so it is deferred and
+# included by that route alone; chart code looks up window.Plotly lazily.
+PLOTLY_SCRIPT = Script(src="https://cdn.plot.ly/plotly-2.35.2.min.js", defer=True)
+
+# Compress pages, HTMX fragments and the layout assets; chat streams over the
+# WebSocket, which the middleware passes through untouched.
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # Voice mode: /ws/voice proxy to the x.ai realtime agent (with the get_positions tool).
 from engine.voice import register_voice_routes  # noqa: E402
 
@@ -965,14 +1093,24 @@ class _AppState:
     _orch = None
     _bg_task = None
     _bg_stop = threading.Event()
-    command_history: list = []
+    command_history: deque = deque(maxlen=500)
 
 _app_state = _AppState()
 
 # Commands that should bypass the AI agent and go to CommandProcessor
-_CLI_BASES = {"news", "profile", "financials", "price", "movers", "analysts", "valuation",
-              "chart", "equity", "trades", "runs", "top", "report", "load", "pnl"}
-_CLI_EXACT = {"status", "help", "guide", "positions", "account", "accounts"}
+_CLI_BASES = frozenset({"news", "profile", "financials", "price", "movers", "analysts", "valuation",
+                        "chart", "equity", "trades", "runs", "top", "report", "load", "pnl"})
+_CLI_EXACT = frozenset({"status", "help", "guide", "positions", "account", "accounts"})
+
+# One anchored scan decides whether a message is a command at all: an
+# agent:/alpaca:/account: prefix, a base as the first word (bare or with a
+# ":" suffix), or an exact command as the whole message.
+_CLI_COMMAND_RE = re.compile(
+    r"\s*(?:(?:agent|alpaca|account):"
+    rf"|(?:{'|'.join(sorted(_CLI_BASES))})(?=[:\s]|\Z)"
+    rf"|(?:{'|'.join(sorted(_CLI_EXACT))})\s*\Z)",
+    re.IGNORECASE,
+)
 
 # Long-running commands that get streamed with log console instead of blocking
 _STREAMING_COMMANDS = {
@@ -981,26 +1119,40 @@ _STREAMING_COMMANDS = {
 }
 
 
-async def _command_interceptor(msg: str, session):
-    """Detect CLI commands and route to CommandProcessor. Returns markdown or None."""
-    cmd_lower = msg.strip().lower()
-    first_word = cmd_lower.split()[0] if cmd_lower.split() else ""
-    base = first_word.split(":")[0]
+def _paper_account_name(api_key: str, secret_key: str) -> str:
+    """Name a new account after its Alpaca paper account number, if reachable."""
+    name = f"Account ({api_key[:6]}...)"
+    try:
+        from utils.alpaca_util import AlpacaAPI
+        client = AlpacaAPI(api_key=api_key, secret_key=secret_key, paper=True)
+        acct_info = client.get_account()
+        if "error" not in acct_info:
+            acct_num = acct_info.get("account_number", "")
+            name = f"Paper-{acct_num}" if acct_num else name
+    except Exception:
+        pass
+    return name
 
-    is_command = (
-        first_word.startswith("agent:") or
-        first_word.startswith("alpaca:") or
-        first_word.startswith("account:") or
-        cmd_lower in _CLI_EXACT or
-        base in _CLI_BASES
-    )
 
-    if not is_command:
+async def _command_interceptor(msg: str, session):
+    """Detect CLI commands and route to CommandProcessor. Returns markdown or None.
+
+    Direct tool calls block on HTTP/DB, so they run in the threadpool to keep
+    the websocket event loop free for other chats.
+    """
+    if not _CLI_COMMAND_RE.match(msg):
         return None
 
+    cmd_lower = msg.strip().lower()
+    first_word = cmd_lower.split(maxsplit=1)[0]
+    base = first_word.split(":")[0]
+
     # Special case: "help" returns chat-friendly markdown (Rich tables don't work here)
     if cmd_lower in ("help", "h", "?"):
         return _AGUI_HELP
+    # The CLI's guide command launches a browser on the host; chat just links it.
+    if cmd_lower == "guide":
+        return _AGUI_GUIDE
 
     # chart:<TICKER> — stock price chart (bypass CommandProcessor)
     if base == "chart":
@@ -1010,11 +1162,10 @@ async def _command_interceptor(msg: str, session):
             if ticker.lower() == "equity":
                 return "Did you mean `equity:<run_id>`? Use `runs` to see recent run IDs, then `equity:abc12345`."
             period = "3mo"
-            import re as _re
-            pm = _re.search(r'period:(\S+)', msg.strip().lower())
+            pm = re.search(r'period:(\S+)', msg.strip().lower())
             if pm:
                 period = pm.group(1)
-            return show_stock_chart(ticker, period)
+            return await run_in_threadpool(show_stock_chart, ticker, period)
         return "Usage: `chart:AAPL` or `chart:AAPL period:1y`"
 
     # equity [paper|backtest] [slug] [run-id] — equity curve chart
@@ -1039,39 +1190,34 @@ async def _command_interceptor(msg: str, session):
                 rid = p
             elif not strategy:
                 strategy = pl
-        return show_equity_curve(run_id=rid, trade_type=trade_type, strategy=strategy)
+        return await run_in_threadpool(
+            show_equity_curve, run_id=rid, trade_type=trade_type, strategy=strategy,
+        )
 
     # Alpaca account/positions — direct tool call, bypass CommandProcessor
     if cmd_lower == "positions":
-        return get_alpaca_positions()
+        return await run_in_threadpool(get_alpaca_positions)
     if cmd_lower == "account":
-        return get_alpaca_account()
+        return await run_in_threadpool(get_alpaca_account)
 
     # Account management commands
     if cmd_lower == "accounts":
-        return list_user_accounts()
+        return await run_in_threadpool(list_user_accounts)
 
     if cmd_lower.startswith("account:add"):
         parts = msg.strip().split()
         if len(parts) < 3:
             return "**Usage:** `account:add <API_KEY> <SECRET_KEY>`\n\nExample: `account:add PKXXXXXXXX ECpXXXXXXXX`"
         api_key, sec_key = parts[1], parts[2]
-        acc_name = f"Account ({api_key[:6]}...)"
-        try:
-            from utils.alpaca_util import AlpacaAPI
-            client = AlpacaAPI(api_key=api_key, secret_key=sec_key, paper=True)
-            acct_info = client.get_account()
-            if "error" not in acct_info:
-                acct_num = acct_info.get("account_number", "")
-                acc_name = f"Paper-{acct_num}" if acct_num else acc_name
-        except Exception:
-            pass
+        acc_name = await run_in_threadpool(_paper_account_name, api_key, sec_key)
         user_id = session.get("user", {}).get("user_id") if session.get("user") else None
         if not user_id:
             return "Not logged in. Please sign in first."
-        from utils.auth import store_alpaca_keys
         try:
-            new_id = store_alpaca_keys(user_id, api_key, sec_key, account_name=acc_name)
+            new_id = await run_in_threadpool(
+                store_alpaca_keys, user_id, api_key, sec_key, account_name=acc_name,
+            )
+            _forget_account_count(user_id)
             return f"✓ **Account '{acc_name}' saved!**\n\nID: `{new_id}`\n\nThis account is now active."
         except Exception as e:
             return f"✗ Failed to add account: {e}"
@@ -1083,8 +1229,7 @@ async def _command_interceptor(msg: str, session):
         user_id = session.get("user", {}).get("user_id") if session.get("user") else None
         if not user_id:
             return "Not logged in."
-        from utils.auth import get_user_accounts
-        accounts = get_user_accounts(user_id)
+        accounts = await run_in_threadpool(get_user_accounts, user_id)
         if not accounts:
             return "No accounts found. Use `account:add` first."
         matched = None
@@ -1120,6 +1265,8 @@ async def _command_interceptor(msg: str, session):
     return result or "Command executed."
 
 
+_AGUI_GUIDE = "# User Guide\n\nVisit the full guide at: [https://alpatrade.dev/guide](https://alpatrade.dev/guide)"
+
 _AGUI_HELP = """# AlpaTrade Commands
 
 ## Backtest
@@ -1215,11 +1362,12 @@ body {
 }
 
 /* === 3-Pane Grid === */
+/* No transition on the columns: opening the right pane changes the track count,
+   and an animatable template would re-run grid layout on every frame. */
 .app-layout {
   display: grid;
   grid-template-columns: 260px 1fr;
   height: 100vh;
-  transition: grid-template-columns 0.3s ease;
 }
 
 .app-layout .right-pane {
@@ -2011,7 +2159,7 @@ body {
 FREE_QUERY_LIMIT = 50
 
 
-def _session_login(session, user: Dict):
+def _session_login(session, user: Dict, password_set: Optional[bool] = None):
     display = user.get("display_name") or ""
     if display.startswith("$2") or not display.strip():
         display = user.get("email", "user").split("@")[0]
@@ -2021,6 +2169,11 @@ def _session_login(session, user: Dict):
         "display_name": display,
     }
     session["query_count"] = 0
+    # Cached for the profile page; Google-only accounts may have no password.
+    if password_set is None and "password_hash" in user:
+        password_set = bool(user["password_hash"])
+    if password_set is not None:
+        session["has_password"] = password_set
 
 
 # ---------------------------------------------------------------------------
@@ -2144,69 +2297,110 @@ def _help_expanders():
 # Left pane builder
 # ---------------------------------------------------------------------------
 
-def _left_pane(session):
-    """Build the left sidebar: brand, new chat, conversations, nav, auth/user."""
+# Linked-account count for the sidebar badge, cached ~5 min per user so page
+# loads skip the accounts query. Routes that add or remove accounts forget
+# the entry; the TTL bounds staleness from changes made elsewhere. Like
+# _ttl_cached, the oldest entry is evicted once maxsize users are cached.
+_account_counts: Dict[str, tuple] = {}
+_ACCOUNT_COUNT_TTL = 300  # seconds
+_ACCOUNT_COUNT_MAXSIZE = 1024
+
+
+def _account_count(user_id: str) -> int:
+    """Return how many active Alpaca accounts the user has linked (cached)."""
+    now = time.monotonic()
+    hit = _account_counts.get(user_id)
+    if hit:
+        if (now - hit[1]) < _ACCOUNT_COUNT_TTL:
+            return hit[0]
+        _forget_account_count(user_id)
+    try:
+        count = len(get_user_accounts(user_id))
+    except Exception:
+        return 0
+    _remember_account_count(user_id, count)
+    return count
+
+
+def _remember_account_count(user_id: str, count: int):
+    _account_counts.pop(user_id, None)  # re-insert as the newest entry
+    if len(_account_counts) >= _ACCOUNT_COUNT_MAXSIZE:
+        _account_counts.pop(next(iter(_account_counts)), None)  # oldest insertion
+    _account_counts[user_id] = (count, time.monotonic())
+
+
+def _forget_account_count(user_id: str):
+    _account_counts.pop(user_id, None)
+
+
+def _left_pane_key(session) -> tuple:
+    """Return the (name, email, account_count) the sidebar renders from."""
     user = session.get("user")
-    thread_id = session.get("thread_id", "")
+    if not user:
+        return (None, "", 0)
+    name = user.get("display_name") or user.get("email", "user")
+    return (name, user.get("email", ""), _account_count(user["user_id"]))
 
-    parts = []
 
-    # Header: Brand + CHAT badge
-    parts.append(
+def _left_pane(session, key: Optional[tuple] = None):
+    """Build the left sidebar: brand, new chat, conversations, nav, auth/user."""
+    return NotStr(_left_pane_html(*(key or _left_pane_key(session))))
+
+
+# Sidebar nav links: one fixed variant for visitors, one for signed-in users.
+_NAV_ANON_HTML = to_xml(Div(
+    A("Dashboard", href="https://alpatrade.dev", target="_blank"),
+    cls="sidebar-nav",
+))
+_NAV_AUTH_HTML = to_xml(Div(
+    A("Dashboard", href="https://alpatrade.dev", target="_blank"),
+    A("Profile", href="/profile"),
+    A("Logout", href="/logout", cls="logout-btn"),
+    cls="sidebar-nav",
+))
+
+# Brand header, new-chat button, help expanders and the (htmx-loaded)
+# conversation list are identical for every visitor: render them once.
+_LEFT_PANE_TOP_HTML = "".join(to_xml(ft) for ft in (
+    Div(
+        A("AlpaTrade", href="/", cls="brand"),
+        Span("CHAT", cls="chat-badge"),
+        cls="sidebar-header",
+    ),
+    Button(
+        "+ New Chat",
+        cls="new-chat-btn",
+        onclick="window.location.href='/?new=1'",
+    ),
+    # Help expanders — collapsible command reference
+    _help_expanders(),
+    Div(
+        H4("Recent"),
         Div(
-            A("AlpaTrade", href="/", cls="brand"),
-            Span("CHAT", cls="chat-badge"),
-            cls="sidebar-header",
-        )
-    )
+            id="conv-list",
+            hx_get="/agui-conv/list",
+            hx_trigger="load",
+            hx_swap="innerHTML",
+        ),
+        cls="conv-section",
+    ),
+))
 
-    # New Chat button
-    parts.append(
-        Button(
-            "+ New Chat",
-            cls="new-chat-btn",
-            onclick="window.location.href='/?new=1'",
-        )
-    )
 
-    # Help expanders — collapsible command reference
-    parts.append(_help_expanders())
+@lru_cache(maxsize=1024)
+def _left_pane_html(name: Optional[str], email: str, account_count: int) -> str:
+    """Render the sidebar to HTML once per (user name, email, account count).
 
-    # Conversation list
-    parts.append(
-        Div(
-            H4("Recent"),
-            Div(
-                id="conv-list",
-                hx_get="/agui-conv/list",
-                hx_trigger="load",
-                hx_swap="innerHTML",
-            ),
-            cls="conv-section",
-        )
-    )
+    ``name`` is None for anonymous visitors. Everything else in the pane is
+    static, so the cache key covers all of its inputs and needs no clearing.
+    """
+    parts = [NotStr(_LEFT_PANE_TOP_HTML)]
 
     # Navigation
-    nav = Div(cls="sidebar-nav")
-    nav_links = [A("Dashboard", href="https://alpatrade.dev", target="_blank")]
-    if user:
-        nav_links.append(A("Profile", href="/profile"))
-        nav_links.append(A("Logout", href="/logout", cls="logout-btn"))
-    nav = Div(*nav_links, cls="sidebar-nav")
-    parts.append(nav)
+    parts.append(NotStr(_NAV_AUTH_HTML if name is not None else _NAV_ANON_HTML))
 
     # Auth section (compact, at bottom) or user info
-    if user:
-        name = user.get("display_name") or user.get("email", "user")
-        email = user.get("email", "")
-
-        account_count = 0
-        try:
-            from utils.auth import get_user_accounts
-            account_count = len(get_user_accounts(user["user_id"]))
-        except Exception:
-            pass
-
+    if name is not None:
         key_badge = (
             Span(f"{account_count} account{'s' if account_count != 1 else ''}", cls="key-status configured")
             if account_count > 0
@@ -2238,7 +2432,7 @@ def _left_pane(session):
     # Footer
     parts.append(Div("Powered by AlpaTrade", cls="sidebar-footer"))
 
-    return Div(*parts, cls="left-pane", id="left-pane")
+    return to_xml(Div(*parts, cls="left-pane", id="left-pane"))
 
 
 # ---------------------------------------------------------------------------
@@ -2287,6 +2481,10 @@ def _right_pane():
     )
 
 
+# The right pane has no per-request state, so render it once at import.
+_RIGHT_PANE_HTML = to_xml(_right_pane())
+
+
 # ---------------------------------------------------------------------------
 # Layout JS
 # ---------------------------------------------------------------------------
@@ -2389,57 +2587,187 @@ VOICE_CSS = """
 """
 
 
+# ---------------------------------------------------------------------------
+# Static layout assets — served once, cached by the browser
+# ---------------------------------------------------------------------------
+
+# The voice styles ride along in the shared stylesheet instead of an inline
+# <style> on every chat page render. Both assets are minified once here when
+# rcssmin/rjsmin are installed and served as-is otherwise.
+_LAYOUT_CSS_SRC = LAYOUT_CSS + VOICE_CSS
+LAYOUT_CSS_BYTES = (rcssmin.cssmin(_LAYOUT_CSS_SRC) if rcssmin else _LAYOUT_CSS_SRC).encode()
+LAYOUT_JS_BYTES = (rjsmin.jsmin(LAYOUT_JS) if rjsmin else LAYOUT_JS).encode()
+LAYOUT_CSS_ETAG = hashlib.md5(LAYOUT_CSS_BYTES).hexdigest()
+LAYOUT_JS_ETAG = hashlib.md5(LAYOUT_JS_BYTES).hexdigest()
+
+# Brotli at max quality is too slow per request but fine once at import; the
+# GZip middleware leaves responses that already carry a Content-Encoding alone.
+LAYOUT_CSS_BR = brotli.compress(LAYOUT_CSS_BYTES, quality=11) if brotli else None
+LAYOUT_JS_BR = brotli.compress(LAYOUT_JS_BYTES, quality=11) if brotli else None
+
+# The content hash is part of the URL, so a deploy that changes the asset
+# changes the link and "immutable" never serves a stale copy.
+# fast_app's static-file catch-all claims every *.css / *.js path, so these
+# routes deliberately carry no file extension.
+LAYOUT_CSS_URL = f"/layout/css?v={LAYOUT_CSS_ETAG[:12]}"
+LAYOUT_JS_URL = f"/layout/js?v={LAYOUT_JS_ETAG[:12]}"
+
+# The tags pointing at them never change either; pages reuse these nodes.
+# The layout script only defines click handlers and a DOMContentLoaded hook,
+# and deferred scripts run before that event, so it need not block parsing.
+LAYOUT_CSS_LINK = Link(rel="stylesheet", href=LAYOUT_CSS_URL)
+LAYOUT_JS_SCRIPT = Script(src=LAYOUT_JS_URL, defer=True)
+
+STATIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(request, etag: str) -> bool:
+    """Weak If-None-Match comparison: any listed tag (or ``*``) matches."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if len(tag) >= 2 and tag[0] == tag[-1] == '"':
+            tag = tag[1:-1]
+        if tag == etag:
+            return True
+    return False
+
+
+def _static_asset(request, body: bytes, etag: str, media_type: str,
+                  br_body: Optional[bytes] = None):
+    """Return a precomputed asset, answering 304 when the ETag still matches.
+
+    ``br_body`` is a Brotli-compressed copy sent to clients that accept it;
+    it gets its own strong ETag since it is a different representation.
+    Other bodies may still be gzipped on the way out, so their ETag is weak.
+    """
+    headers = {"Cache-Control": STATIC_CACHE_CONTROL}
+    use_br = br_body is not None and "br" in request.headers.get("accept-encoding", "")
+    if br_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if use_br:
+        etag, body = f"{etag}-br", br_body
+        headers["Content-Encoding"] = "br"
+    headers["ETag"] = f'"{etag}"' if use_br else f'W/"{etag}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
+
+
+# Page ETags hash the inputs a page renders from rather than its HTML, so a
+# match skips rendering too. The per-process version folds in the code: any
+# restart or deploy changes every page ETag. They are sent weak because
+# GZipMiddleware may encode the same page differently per client.
+_PAGE_VERSION = _uuid.uuid4().hex
+PAGE_CACHE_CONTROL = "private, no-cache"
+
+
+def _page_etag(*inputs) -> str:
+    return hashlib.md5("|".join(map(str, (_PAGE_VERSION, *inputs))).encode()).hexdigest()
+
+
+def _page_headers(etag: str) -> tuple:
+    return (HttpHeader("ETag", f'W/"{etag}"'), HttpHeader("Cache-Control", PAGE_CACHE_CONTROL))
+
+
+def _not_modified(etag: str):
+    return Response(status_code=304,
+                    headers={"ETag": f'W/"{etag}"', "Cache-Control": PAGE_CACHE_CONTROL})
+
+
+@rt("/layout/css")
+def get(request):
+    return _static_asset(request, LAYOUT_CSS_BYTES, LAYOUT_CSS_ETAG, "text/css", LAYOUT_CSS_BR)
+
+
+@rt("/layout/js")
+def get(request):
+    return _static_asset(request, LAYOUT_JS_BYTES, LAYOUT_JS_ETAG, "application/javascript",
+                         LAYOUT_JS_BR)
+
+
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
 
+def _app_layout_ft(left, thread_id: str):
+    """Build the 3-pane chat layout around a rendered sidebar."""
+    return Div(
+        left,
+        Div(
+            Div(
+                H2("AlpaTrade Chat"),
+                Button(
+                    "🎙 Voice",
+                    id="voice-btn",
+                    cls="toggle-trace-btn voice-btn",
+                    onclick="toggleVoice()",
+                    title="Talk to AlpaTrade — ask for your positions",
+                    type="button",
+                ),
+                Button(
+                    "News",
+                    cls="toggle-trace-btn",
+                    onclick="toggleRightPane()",
+                ),
+                cls="center-header",
+            ),
+            Div(agui.chat(thread_id), cls="center-chat"),
+            cls="center-pane",
+        ),
+        NotStr(_RIGHT_PANE_HTML),
+        cls="app-layout right-open",
+    )
+
+
+# Apart from the sidebar and the thread id the layout never changes, so it is
+# rendered once with placeholders and split into the fixed parts around them.
+_LEFT_SLOT, _THREAD_SLOT = "__AGUI_LEFT_PANE__", "__AGUI_THREAD_ID__"
+_layout_head, _layout_rest = to_xml(_app_layout_ft(NotStr(_LEFT_SLOT), _THREAD_SLOT)).split(_LEFT_SLOT)
+_LAYOUT_PARTS = (_layout_head, *_layout_rest.split(_THREAD_SLOT))
+assert len(_LAYOUT_PARTS) == 3, "layout template must hold exactly one thread id slot"
+
+
+def _app_layout(left, thread_id: str):
+    """Fill the pre-rendered layout with the sidebar HTML and the thread id."""
+    head, mid, tail = _LAYOUT_PARTS
+    return NotStr(f"{head}{left}{mid}{html.escape(thread_id)}{tail}")
+
+
 @rt("/")
-def get(session, new: str = "", thread: str = ""):
-    # Force new thread
-    if new == "1":
+def get(request, session, new: str = "", thread: str = ""):
+    current = session.get("thread_id")
+    if new == "1" or not (thread or current):
+        # Force a new thread (or start the first one). Must stay a UUID:
+        # chat_conversations.thread_id is a UUID column (sql/13_*).
         thread_id = str(_uuid.uuid4())
-        session["thread_id"] = thread_id
-    elif thread:
-        # Resume a specific thread
-        thread_id = thread
-        session["thread_id"] = thread_id
     else:
-        thread_id = session.get("thread_id")
-        if not thread_id:
-            thread_id = str(_uuid.uuid4())
-            session["thread_id"] = thread_id
+        # Resume the requested thread, else the session's current one
+        thread_id = thread or current
+
+    # Touch the session only when the thread actually changes; a plain
+    # reload of / leaves it as is.
+    if thread_id != current:
+        session["thread_id"] = thread_id
+
+    pane_key = _left_pane_key(session)
+    etag = _page_etag("chat", thread_id, *pane_key)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
     return (
+        *_page_headers(etag),
         Title("AlpaTrade"),
-        Style(LAYOUT_CSS),
-        Style(VOICE_CSS),
-        Div(
-            _left_pane(session),
-            Div(
-                Div(
-                    H2("AlpaTrade Chat"),
-                    Button(
-                        "🎙 Voice",
-                        id="voice-btn",
-                        cls="toggle-trace-btn voice-btn",
-                        onclick="toggleVoice()",
-                        title="Talk to AlpaTrade — ask for your positions",
-                        type="button",
-                    ),
-                    Button(
-                        "News",
-                        cls="toggle-trace-btn",
-                        onclick="toggleRightPane()",
-                    ),
-                    cls="center-header",
-                ),
-                Div(agui.chat(thread_id), cls="center-chat"),
-                cls="center-pane",
-            ),
-            _right_pane(),
-            cls="app-layout right-open",
-        ),
-        Script(LAYOUT_JS),
+        LAYOUT_CSS_LINK,
+        PLOTLY_SCRIPT,
+        _app_layout(_left_pane(session, pane_key), thread_id),
+        LAYOUT_JS_SCRIPT,
     )
 
 
@@ -2451,8 +2779,7 @@ def get(session, new: str = "", thread: str = ""):
 def get(ticker: str = ""):
     """Return market news as markdown (rendered client-side via marked.js)."""
     try:
-        from utils.market_research_util import MarketResearch
-        return MarketResearch().news(ticker=(ticker.upper() or None), limit=12)
+        return _market_research().news(ticker=(ticker.upper() or None), limit=12)
     except Exception as e:  # noqa: BLE001
         return f"Could not load news: {e}"
 
@@ -2491,37 +2818,33 @@ def get(session):
 # Detail panel route — shows run + backtest summary + trades
 # ---------------------------------------------------------------------------
 
+_DETAIL_RUN_SQL = text(
+    "SELECT run_id, mode, strategy, status, started_at, completed_at FROM alpatrade.runs WHERE run_id = :rid"
+)
+_DETAIL_SUMMARY_SQL = text("""SELECT sharpe_ratio, total_return, annualized_return, total_pnl,
+                                     win_rate, total_trades, max_drawdown
+                              FROM alpatrade.backtest_summaries WHERE run_id = :rid LIMIT 1""")
+_DETAIL_TRADE_COUNT_SQL = text("SELECT count(*) FROM alpatrade.trades WHERE run_id = :rid")
+
+
 @rt("/agui/detail/{run_id}")
 def get(run_id: str, session):
     """Fetch run details for the right-pane detail panel."""
     try:
-        from utils.db.db_pool import DatabasePool
-        from sqlalchemy import text
         pool = DatabasePool()
 
         with pool.get_session() as db:
             # Fetch run info
-            run = db.execute(
-                text("SELECT run_id, mode, strategy, status, started_at, completed_at FROM alpatrade.runs WHERE run_id = :rid"),
-                {"rid": run_id},
-            ).fetchone()
+            run = db.execute(_DETAIL_RUN_SQL, {"rid": run_id}).fetchone()
 
             if not run:
                 return Div(P(f"Run {run_id[:8]}... not found.", style="color: #dc2626;"))
 
             # Fetch backtest summary
-            summary = db.execute(
-                text("""SELECT sharpe_ratio, total_return, annualized_return, total_pnl,
-                               win_rate, total_trades, max_drawdown
-                        FROM alpatrade.backtest_summaries WHERE run_id = :rid LIMIT 1"""),
-                {"rid": run_id},
-            ).fetchone()
+            summary = db.execute(_DETAIL_SUMMARY_SQL, {"rid": run_id}).fetchone()
 
             # Fetch trades count
-            trade_count = db.execute(
-                text("SELECT count(*) FROM alpatrade.trades WHERE run_id = :rid"),
-                {"rid": run_id},
-            ).scalar() or 0
+            trade_count = db.execute(_DETAIL_TRADE_COUNT_SQL, {"rid": run_id}).scalar() or 0
 
         # Build detail HTML
         sections = []
@@ -2589,9 +2912,8 @@ def get(run_id: str, session):
 # Auth routes (sidebar-based, return HTML fragments)
 # ---------------------------------------------------------------------------
 
-@rt("/agui-auth/login-form")
-def login_form_fragment():
-    """Return the login form for the sidebar."""
+def _login_form():
+    """Build the sidebar login form."""
     parts = []
     if _oauth_enabled:
         parts.append(A(NotStr(_GOOGLE_SVG), "Sign in with Google", href="/login", cls="google-btn"))
@@ -2616,9 +2938,8 @@ def login_form_fragment():
     return Div(*parts, cls="sidebar-auth")
 
 
-@rt("/agui-auth/register-form")
-def register_form_fragment():
-    """Return the register form for the sidebar."""
+def _register_form():
+    """Build the sidebar register form."""
     parts = []
     if _oauth_enabled:
         parts.append(A(NotStr(_GOOGLE_SVG), "Sign up with Google", href="/login", cls="google-btn"))
@@ -2645,58 +2966,86 @@ def register_form_fragment():
     return Div(*parts, cls="sidebar-auth")
 
 
+# Both forms are static (OAuth availability is fixed at startup), so they are
+# serialized once and every HTMX load is served from the same bytes.
+_LOGIN_FORM_HTML = to_xml(_login_form())
+_REGISTER_FORM_HTML = to_xml(_register_form())
+_LOGIN_FORM_BYTES = _LOGIN_FORM_HTML.encode()
+_REGISTER_FORM_BYTES = _REGISTER_FORM_HTML.encode()
+
+# Login/register replies are a fixed message above one of those forms, or a
+# success note that reloads the page; each distinct reply is rendered once.
+_RELOAD_SCRIPT = Script("setTimeout(function(){ window.location.reload(); }, 500);")
+_LOGGED_IN_BYTES = to_xml(Div(P("Logged in!", cls="success-msg"), _RELOAD_SCRIPT)).encode()
+_CREATED_BYTES = to_xml(Div(P("Account created!", cls="success-msg"), _RELOAD_SCRIPT)).encode()
+
+
+@lru_cache(maxsize=None)
+def _auth_error_bytes(msg: str, form_html: str) -> bytes:
+    return to_xml(Div(P(msg, cls="error-msg"), NotStr(form_html))).encode()
+
+
+def _auth_reply(body: bytes) -> Response:
+    return Response(body, media_type="text/html")
+
+
+def _auth_error(msg: str, form_html: str) -> Response:
+    return _auth_reply(_auth_error_bytes(msg, form_html))
+
+
+@rt("/agui-auth/login-form")
+def login_form_fragment():
+    """Return the login form for the sidebar."""
+    return Response(_LOGIN_FORM_BYTES, media_type="text/html")
+
+
+@rt("/agui-auth/register-form")
+def register_form_fragment():
+    """Return the register form for the sidebar."""
+    return Response(_REGISTER_FORM_BYTES, media_type="text/html")
+
+
 @rt("/agui-auth/login")
-def auth_login(session, email: str = "", password: str = ""):
+async def auth_login(session, email: str = "", password: str = ""):
     if not email or not password:
-        return Div(P("Email and password required.", cls="error-msg"),
-                   login_form_fragment())
-    from utils.auth import authenticate
-    user = authenticate(email, password)
+        return _auth_error("Email and password required.", _LOGIN_FORM_HTML)
+    user = await run_in_threadpool(authenticate, email, password)
     if not user:
-        return Div(P("Invalid email or password.", cls="error-msg"),
-                   login_form_fragment())
-    _session_login(session, user)
+        return _auth_error("Invalid email or password.", _LOGIN_FORM_HTML)
+    _session_login(session, user, password_set=True)
     # Refresh the whole page to update sidebar
-    return Div(
-        P("Logged in!", cls="success-msg"),
-        Script("setTimeout(function(){ window.location.reload(); }, 500);"),
-    )
+    return _auth_reply(_LOGGED_IN_BYTES)
 
 
 @rt("/agui-auth/register")
-def auth_register(session, email: str = "", password: str = "", display_name: str = ""):
+async def auth_register(session, email: str = "", password: str = "", display_name: str = ""):
     if not email or not password:
-        return Div(P("Email and password required.", cls="error-msg"),
-                   register_form_fragment())
+        return _auth_error("Email and password required.", _REGISTER_FORM_HTML)
     if len(password) < 8:
-        return Div(P("Password must be at least 8 characters.", cls="error-msg"),
-                   register_form_fragment())
-    from utils.auth import create_user, get_user_by_email
-    existing = get_user_by_email(email)
+        return _auth_error("Password must be at least 8 characters.", _REGISTER_FORM_HTML)
+    existing = await run_in_threadpool(get_user_by_email, email)
     if existing:
-        return Div(
-            P("An account with this email already exists. Please sign in instead.", cls="error-msg"),
-            login_form_fragment(),
-        )
-    user = create_user(email=email, password=password, display_name=display_name or None)
-    if not user:
-        return Div(P("Unable to create account. Please try again.", cls="error-msg"),
-                   register_form_fragment())
-    _session_login(session, user)
-    return Div(
-        P("Account created!", cls="success-msg"),
-        Script("setTimeout(function(){ window.location.reload(); }, 500);"),
+        return _auth_error("An account with this email already exists. Please sign in instead.",
+                           _LOGIN_FORM_HTML)
+    user = await run_in_threadpool(
+        create_user, email=email, password=password, display_name=display_name or None,
     )
+    if not user:
+        return _auth_error("Unable to create account. Please try again.", _REGISTER_FORM_HTML)
+    _session_login(session, user, password_set=True)
+    return _auth_reply(_CREATED_BYTES)
 
 
 @rt("/logout")
 def logout(session):
-    session.clear()
+    # An anonymous visitor has nothing to clear; leave the cookie untouched.
+    if session:
+        session.clear()
     return RedirectResponse("/", status_code=307)
 
 
 @rt("/profile")
-def profile(session, msg: str = ""):
+def profile(request, session, msg: str = ""):
     user = session.get("user")
     if not user:
         return RedirectResponse("/")
@@ -2704,8 +3053,9 @@ def profile(session, msg: str = ""):
     # Fetch all accounts for this user (includes keys added from CLI)
     accounts = []
     try:
-        from utils.auth import get_user_accounts
         accounts = get_user_accounts(user["user_id"])
+        # The sidebar badge reuses this fresh count instead of its own query.
+        _remember_account_count(user["user_id"], len(accounts))
     except Exception:
         pass
 
@@ -2716,13 +3066,21 @@ def profile(session, msg: str = ""):
         else Span("Not configured", cls="key-status not-configured")
     )
 
-    # Check if user has a password set (Google-only users may not)
-    user_has_password = False
-    try:
-        from utils.auth import has_password
-        user_has_password = has_password(user["user_id"])
-    except Exception:
-        pass
+    # Check if user has a password set (Google-only users may not). Login
+    # and password changes record this in the session; older sessions fall
+    # back to the query once and keep the answer.
+    user_has_password = session.get("has_password")
+    if user_has_password is None:
+        try:
+            user_has_password = has_password(user["user_id"])
+            session["has_password"] = user_has_password
+        except Exception:
+            user_has_password = False
+
+    etag = _page_etag("profile", user["user_id"], user.get("display_name", ""),
+                      accounts, user_has_password, msg)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
 
     parts = [
         H2("Profile"),
@@ -2822,8 +3180,9 @@ def profile(session, msg: str = ""):
     ])
 
     return (
+        *_page_headers(etag),
         Title("Profile — AlpaTrade"),
-        Style(LAYOUT_CSS),
+        LAYOUT_CSS_LINK,
         Div(
             Div(
                 A("← Back to Chat", href="/", cls="back-link"),
@@ -2844,7 +3203,6 @@ def profile_name(session, display_name: str = ""):
     if not display_name.strip():
         return RedirectResponse("/profile?msg=Display+name+cannot+be+empty", status_code=303)
     try:
-        from utils.auth import update_display_name
         if update_display_name(user["user_id"], display_name):
             session["user"]["display_name"] = display_name.strip()
             return RedirectResponse("/profile?msg=Display+name+updated", status_code=303)
@@ -2864,7 +3222,6 @@ def profile_password(session, current_password: str = "", new_password: str = ""
     if len(new_password) < 8:
         return RedirectResponse("/profile?msg=Password+must+be+at+least+8+characters", status_code=303)
     try:
-        from utils.auth import has_password, verify_password, get_user_by_email, update_password
         # If user already has a password, verify the current one
         if has_password(user["user_id"]):
             if not current_password:
@@ -2873,6 +3230,7 @@ def profile_password(session, current_password: str = "", new_password: str = ""
             if not db_user or not verify_password(current_password, db_user["password_hash"]):
                 return RedirectResponse("/profile?msg=Current+password+is+incorrect", status_code=303)
         if update_password(user["user_id"], new_password):
+            session["has_password"] = True
             return RedirectResponse("/profile?msg=Password+updated+successfully", status_code=303)
         return RedirectResponse("/profile?msg=Failed+to+update+password", status_code=303)
     except Exception as e:
@@ -2881,22 +3239,31 @@ def profile_password(session, current_password: str = "", new_password: str = ""
 
 
 @rt("/profile/keys")
-def profile_keys(session, api_key: str = "", secret_key: str = "", account_name: str = ""):
+async def profile_keys(session, api_key: str = "", secret_key: str = "", account_name: str = ""):
     user = session.get("user")
     if not user:
         return RedirectResponse("/")
     if not api_key or not secret_key:
         return RedirectResponse("/profile?msg=Both+keys+are+required", status_code=303)
     try:
-        from utils.auth import store_alpaca_keys
         name = account_name.strip() or "Default Account"
-        store_alpaca_keys(user["user_id"], api_key, secret_key, account_name=name)
+        await run_in_threadpool(
+            store_alpaca_keys, user["user_id"], api_key, secret_key, account_name=name,
+        )
+        _forget_account_count(user["user_id"])
         return RedirectResponse("/profile?msg=Alpaca+keys+saved+successfully", status_code=303)
     except Exception as e:
         logger.error(f"Failed to store Alpaca keys: {e}")
         return RedirectResponse("/profile?msg=Error+saving+keys", status_code=303)
 
 
+_DEACTIVATE_ACCOUNT_SQL = text("""
+    UPDATE alpatrade.user_accounts
+    SET is_active = FALSE, updated_at = NOW()
+    WHERE account_id = :account_id AND user_id = :user_id
+""")
+
+
 @rt("/profile/keys/remove")
 def profile_keys_remove(session, account_id: str = ""):
     user = session.get("user")
@@ -2905,18 +3272,13 @@ def profile_keys_remove(session, account_id: str = ""):
     if not account_id:
         return RedirectResponse("/profile", status_code=303)
     try:
-        from utils.db.db_pool import DatabasePool
-        from sqlalchemy import text
         pool = DatabasePool()
         with pool.get_session() as db:
             db.execute(
-                text("""
-                    UPDATE alpatrade.user_accounts
-                    SET is_active = FALSE, updated_at = NOW()
-                    WHERE account_id = :account_id AND user_id = :user_id
-                """),
+                _DEACTIVATE_ACCOUNT_SQL,
                 {"account_id": account_id, "user_id": user["user_id"]},
             )
+        _forget_account_count(user["user_id"])
         return RedirectResponse("/profile?msg=Account+removed", status_code=303)
     except Exception as e:
         logger.error(f"Failed to remove account: {e}")
@@ -2927,45 +3289,55 @@ def profile_keys_remove(session, account_id: str = ""):
 # Static content routes (open in new tabs from sidebar)
 # ---------------------------------------------------------------------------
 
+# The guide body is fully static: render it once and reuse the HTML.
+_GUIDE_BODY_HTML = to_xml(Div(
+    Div(
+        A("AlpaTrade", href="/", cls="brand"),
+        Div(
+            H4("Quick Reference"),
+            P("Full guide available at ",
+              A("alpatrade.chat/guide", href="https://alpatrade.chat/guide",
+                target="_blank"),
+              style="font-size: 0.85rem; color: #94a3b8;"),
+            cls="sidebar-section",
+        ),
+        Div(
+            H4("Common Commands"),
+            P("agent:backtest lookback:1m", style="font-size: 0.8rem;"),
+            P("agent:paper duration:7d", style="font-size: 0.8rem;"),
+            P("price AAPL", style="font-size: 0.8rem;"),
+            P("news TSLA", style="font-size: 0.8rem;"),
+            P("trades / runs / status", style="font-size: 0.8rem;"),
+            cls="sidebar-section",
+        ),
+        Div(A("Back to Chat", href="/"), cls="sidebar-section"),
+        cls="left-pane",
+        style="max-width: 400px; margin: 2rem auto; height: auto;",
+    ),
+    style="display: flex; justify-content: center; min-height: 100vh; background: #0f172a;",
+))
+
+
 @rt("/guide")
-def guide(session):
+def guide(request, session):
     """Minimal guide redirect — full guide lives on web_app.py."""
+    etag = _page_etag("guide")
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
     return (
+        *_page_headers(etag),
         Title("Guide — AlpaTrade"),
-        Style(LAYOUT_CSS),
-        Div(
-            Div(
-                A("AlpaTrade", href="/", cls="brand"),
-                Div(
-                    H4("Quick Reference"),
-                    P("Full guide available at ",
-                      A("alpatrade.chat/guide", href="https://alpatrade.chat/guide",
-                        target="_blank"),
-                      style="font-size: 0.85rem; color: #94a3b8;"),
-                    cls="sidebar-section",
-                ),
-                Div(
-                    H4("Common Commands"),
-                    P("agent:backtest lookback:1m", style="font-size: 0.8rem;"),
-                    P("agent:paper duration:7d", style="font-size: 0.8rem;"),
-                    P("price AAPL", style="font-size: 0.8rem;"),
-                    P("news TSLA", style="font-size: 0.8rem;"),
-                    P("trades / runs / status", style="font-size: 0.8rem;"),
-                    cls="sidebar-section",
-                ),
-                Div(A("Back to Chat", href="/"), cls="sidebar-section"),
-                cls="left-pane",
-                style="max-width: 400px; margin: 2rem auto; height: auto;",
-            ),
-            style="display: flex; justify-content: center; min-height: 100vh; background: #0f172a;",
-        ),
+        LAYOUT_CSS_LINK,
+        NotStr(_GUIDE_BODY_HTML),
     )
 
 
 @rt("/screenshots")
 def screenshots():
     """Redirect to main app screenshots."""
-    return RedirectResponse("https://alpatrade.chat/screenshots", status_code=307)
+    # Permanent and cacheable: repeat clicks never reach this worker.
+    return RedirectResponse("https://alpatrade.chat/screenshots", status_code=308,
+                            headers={"Cache-Control": "public, max-age=86400"})
 
 
 # ---------------------------------------------------------------------------
@@ -2999,8 +3371,6 @@ if _oauth_enabled:
         if not email:
             return RedirectResponse("/?error=Google+did+not+provide+email")
 
-        from utils.auth import get_user_by_google_id, get_user_by_email, create_user, link_google_id
-
         user = get_user_by_google_id(google_id) if google_id else None
 
         if not user:
@@ -3051,7 +3421,11 @@ if __name__ == "__main__":
     if port != DEFAULT_PORT:
         print(f"Port {DEFAULT_PORT} in use, using port {port}")
 
-    reload = os.environ.get("AGUI_RELOAD", "true").lower() == "true"
+    # The file watcher is a dev convenience, so it is opt-in. uvicorn[standard]
+    # ships uvloop and httptools, which uvicorn already selects by default.
+    # Stay on one worker: chat threads and their WebSocket subscribers live in
+    # this process's memory.
+    reload = os.environ.get("AGUI_RELOAD", "false").lower() == "true"
     uvicorn.run(
         "agui_app:app",
         host="0.0.0.0",
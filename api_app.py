@@ -5,7 +5,7 @@ import sys
 import threading
 
 logger = logging.getLogger(__name__)
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -50,7 +50,7 @@ load_dotenv()
 class _AppState:
     """Minimal stand-in for StrategyCLI — holds orchestrator state."""
     def __init__(self):
-        self.command_history: list[str] = []
+        self.command_history: deque[str] = deque(maxlen=500)
         self._orch = None
         self._bg_task = None
         self._bg_stop = threading.Event()
@@ -2,7 +2,8 @@
 Database Table Setup for Agent System
 
 Creates the `trades` and `agent_runs` tables if they don't exist.
-Uses the existing DatabasePool from utils/db/db_pool.py.
+Uses the shared per-URL pool from engine.db.pool (`get_pool()`), so agent
+processes reuse warm connections instead of building a new engine.
 """
 
 import sys
@@ -14,8 +15,7 @@ project_root = Path(__file__).parent.parent.parent.absolute()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from sqlalchemy import text
-from utils.db.db_pool import DatabasePool
+from engine.db.pool import DatabasePool, get_pool
 
 logger = logging.getLogger(__name__)
 
@@ -56,13 +56,28 @@ CREATE TABLE IF NOT EXISTS agent_runs (
 """
 
 
+# Set once the tables are known to exist, so repeated in-process calls are free.
+_tables_ready = False
+
+
 def setup_tables(db_pool: DatabasePool = None):
     """Create agent system tables if they don't exist."""
-    pool = db_pool or DatabasePool()
-    with pool.get_session() as session:
-        session.execute(text(TRADES_TABLE_SQL))
-        session.execute(text(AGENT_RUNS_TABLE_SQL))
-        logger.info("Agent tables created/verified: trades, agent_runs")
+    global _tables_ready
+    if _tables_ready:
+        return
+    pool = db_pool or get_pool()
+    # Plain connection + driver SQL: no ORM session or text() compilation
+    # for statements SQLAlchemy never needs to introspect.
+    with pool.engine.begin() as conn:
+        # Steady state: one cheap probe instead of re-issuing the DDL.
+        trades, agent_runs = conn.exec_driver_sql(
+            "SELECT to_regclass('trades'), to_regclass('agent_runs')"
+        ).fetchone()
+        if trades is None or agent_runs is None:
+            conn.exec_driver_sql(TRADES_TABLE_SQL)
+            conn.exec_driver_sql(AGENT_RUNS_TABLE_SQL)
+            logger.info("Agent tables created/verified: trades, agent_runs")
+    _tables_ready = True
 
 
 if __name__ == "__main__":
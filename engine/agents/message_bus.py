@@ -2,31 +2,141 @@
 Inter-Agent Message Bus
 
 File-based JSON message bus for agent communication.
-Messages are persisted to data/agent_messages/ and also kept in-memory for fast access.
+Messages of PERSISTENT_TYPES are appended to data/agent_messages/messages.ndjson (one JSON object
+per line) and the most recent `max_in_memory` are kept in-memory for fast
+access; queries reaching further back scan the log. Per-message `<id>.json`
+files written by older versions are folded into the log on first load.
 """
 
+import os
 import json
+import mmap
+import time
 import uuid
+import queue
+import atexit
+import bisect
 import logging
-from datetime import datetime, timezone
+import threading
+from types import MappingProxyType
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Callable, Tuple, Protocol, Mapping, Union
+
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+LOG_FILE = "messages.ndjson"
+
+# Messages retained in memory; older ones are served from the on-disk log.
+MAX_IN_MEMORY = 10_000
+
+# Threads used to read legacy per-message files on first load.
+LOAD_WORKERS = 8
+
+# Wake the background writer early once this many lines are pending.
+FLUSH_THRESHOLD = 256
+
+# Pending messages per isolated subscriber before new ones are dropped.
+SUBSCRIBER_QUEUE_SIZE = 1024
+
+if orjson is not None:
+    _ORJSON_OPTS = (orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_SERIALIZE_NUMPY)
+    _loads = orjson.loads
+else:
+    _loads = json.loads
+
+# Valid message types
+VALID_TYPES = frozenset({
+    "backtest_request",
+    "backtest_result",
+    "validation_request",
+    "validation_result",
+    "paper_trade_start",
+    "paper_trade_result",
+    "trade_update",
+    "error",
+    "correction",
+    "reconciliation_request",
+    "reconciliation_result",
+})
+
+# Types written to the on-disk log. Request/handshake messages are only useful
+# to live subscribers, so they are dispatched in memory and never persisted.
+PERSISTENT_TYPES = frozenset({
+    "trade_update",
+    "backtest_result",
+    "validation_result",
+    "paper_trade_result",
+    "reconciliation_result",
+    "error",
+})
+
+# Small-int id per type: the per-type index is a list of buckets indexed by id.
+_TYPE_ID: Dict[str, int] = {t: i for i, t in enumerate(sorted(VALID_TYPES))}
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+
+def _iso_to_ns(iso: str) -> int:
+    """ISO-8601 string -> integer nanoseconds since the epoch (naive = UTC)."""
+    dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _US * 1000
+
+
+def _ns_to_iso(ns: int) -> str:
+    return (_EPOCH + timedelta(microseconds=ns // 1000)).isoformat()
+
+
+def _to_ns(ts: Union[str, int]) -> int:
+    return ts if isinstance(ts, int) else _iso_to_ns(ts)
+
 
 class Message:
     """A single message between agents."""
 
+    __slots__ = ("seq", "message_id", "from_agent", "to_agent", "type",
+                 "_type_id", "payload", "_ts_ns", "_ts_iso")
+
     def __init__(self, from_agent: str, to_agent: str, msg_type: str,
                  payload: Dict, message_id: Optional[str] = None,
-                 timestamp: Optional[str] = None):
+                 timestamp: Optional[Union[str, int]] = None,
+                 seq: Optional[int] = None):
+        self.seq = seq  # bus-assigned, monotonic in publish order
         self.message_id = message_id or str(uuid.uuid4())
         self.from_agent = from_agent
         self.to_agent = to_agent
         self.type = msg_type
+        self._type_id = _TYPE_ID.get(msg_type, -1)  # -1: type no longer valid
         self.payload = payload
-        self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        # Integer nanoseconds for ordering/filtering; the ISO string is only
+        # rendered when something reads `timestamp`.
+        if timestamp is None:
+            # Microsecond precision, so the ISO form round-trips exactly.
+            self._ts_ns, self._ts_iso = time.time_ns() // 1000 * 1000, None
+        elif isinstance(timestamp, int):
+            self._ts_ns, self._ts_iso = timestamp, None
+        else:
+            self._ts_ns, self._ts_iso = _iso_to_ns(timestamp), timestamp
+
+    @property
+    def timestamp(self) -> str:
+        if self._ts_iso is None:
+            self._ts_iso = _ns_to_iso(self._ts_ns)
+        return self._ts_iso
 
     def to_dict(self) -> Dict:
         return {
@@ -36,6 +146,7 @@ class Message:
             "type": self.type,
             "payload": self.payload,
             "timestamp": self.timestamp,
+            "seq": self.seq,
         }
 
     @classmethod
@@ -47,103 +158,463 @@ class Message:
             payload=data["payload"],
             message_id=data.get("message_id"),
             timestamp=data.get("timestamp"),
+            seq=data.get("seq"),
         )
 
     def __repr__(self) -> str:
         return f"Message({self.type}: {self.from_agent}->{self.to_agent})"
 
 
+def _read_legacy(path: str) -> Optional[Message]:
+    """Read and parse one legacy `<id>.json` message file."""
+    try:
+        with open(path, "rb") as fh:
+            return Message.from_dict(_loads(fh.read()))
+    except Exception as e:
+        logger.warning(f"Failed to load message {path}: {e}")
+        return None
+
+
+class BusBackend(Protocol):
+    """Interface shared by the message bus backends."""
+
+    def publish(self, from_agent: str, to_agent: str, msg_type: str,
+                payload: Dict) -> Message: ...
+
+    def subscribe(self, agent_name: str, callback: Callable) -> None: ...
+
+    def get_messages(self, to_agent: Optional[str] = None,
+                     msg_type: Optional[str] = None,
+                     since: Optional[str] = None) -> List[Message]: ...
+
+    def get_latest(self, to_agent: str, msg_type: str) -> Optional[Message]: ...
+
+
+class _IsolatedSubscriber:
+    """Runs a subscriber callback on its own thread behind a bounded queue.
+
+    Calling the instance only enqueues, so a slow callback cannot stall
+    publish() or the other subscribers; overflow is dropped and counted.
+    """
+
+    _STOP = object()
+
+    def __init__(self, agent_name: str, callback: Callable, maxsize: int):
+        self.agent_name = agent_name
+        self.callback = callback
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(
+            target=self._run, name=f"message-bus-sub-{agent_name}", daemon=True,
+        )
+        self._thread.start()
+
+    def __call__(self, msg: Message):
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            msg = self._queue.get()
+            if msg is self._STOP:
+                return
+            try:
+                self.callback(msg)
+            except Exception as e:
+                logger.error(f"Subscriber callback error: {e}")
+
+    def stop(self, timeout: float = 1.0):
+        """Deliver what is already queued, then stop the worker."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            return  # callback is stuck; the daemon thread dies with the process
+        self._thread.join(timeout=timeout)
+
+
+def create_bus(**kwargs) -> BusBackend:
+    """Build the bus selected by AGENT_BUS_BACKEND ("file" default, or "pg").
+
+    "pg" adds cross-process delivery over PostgreSQL LISTEN/NOTIFY (see
+    engine.agents.pg_bus); the local NDJSON log is kept either way.
+    """
+    backend = os.getenv("AGENT_BUS_BACKEND", "file").lower()
+    if backend == "pg":
+        from engine.agents.pg_bus import PgNotifyBus
+        return PgNotifyBus(**kwargs)
+    if backend != "file":
+        raise ValueError(f"Unknown AGENT_BUS_BACKEND: {backend!r} (use 'file' or 'pg')")
+    return MessageBus(**kwargs)
+
+
 class MessageBus:
     """File-based + in-memory message bus for inter-agent communication."""
 
-    # Valid message types
-    VALID_TYPES = {
-        "backtest_request",
-        "backtest_result",
-        "validation_request",
-        "validation_result",
-        "paper_trade_start",
-        "paper_trade_result",
-        "trade_update",
-        "error",
-        "correction",
-        "reconciliation_request",
-        "reconciliation_result",
-    }
-
-    def __init__(self, messages_dir: Optional[str] = None):
+    VALID_TYPES = VALID_TYPES
+
+    def __init__(self, messages_dir: Optional[str] = None,
+                 write_period: float = 0.0,
+                 max_in_memory: Optional[int] = MAX_IN_MEMORY,
+                 persistent_types: frozenset = PERSISTENT_TYPES):
+        """
+        Args:
+            messages_dir: Directory holding the NDJSON log.
+            max_in_memory: Messages retained in memory (None = unbounded).
+                Evicted messages stay in the log and are re-read only by
+                get_messages() queries that reach back past the oldest
+                retained message; get_latest() is unaffected.
+            write_period: Seconds between background log flushes. 0 (default)
+                writes and flushes synchronously inside publish(); >0 queues
+                serialized lines for a daemon writer thread, drained on close()
+                and at interpreter exit.
+            persistent_types: Message types appended to the log. Others are
+                delivered and indexed in memory only, so they are not
+                replayed after a restart or once evicted from memory.
+        """
         self.messages_dir = Path(messages_dir or "data/agent_messages")
         self.messages_dir.mkdir(parents=True, exist_ok=True)
-        self._messages: List[Message] = []
-        self._subscribers: Dict[str, List[Callable]] = {}
+        # Bounded, timestamp-ordered history plus per-field indexes so
+        # queries touch only the matching bucket instead of the full list.
+        self.max_in_memory = max_in_memory
+        self.persistent_types = persistent_types
+        self._messages: deque = deque()
+        self._by_to: Dict[str, deque] = {}
+        self._by_type: List[deque] = [deque() for _ in _TYPE_ID]
+        self._seq = 0
+        self._overflowed = False  # some history now lives only on disk
+        self._latest: Dict[Tuple[str, str], Message] = {}
+        # Subscribers keyed by exact recipient; "*" subscribers see everything.
+        # Copy-on-write: subscribe() swaps in a new read-only map under a lock,
+        # so publish() reads a stable snapshot without locking.
+        self._subs: Mapping[str, Tuple[Callable, ...]] = MappingProxyType({})
+        self._subs_lock = threading.Lock()
+        self._log_path = self.messages_dir / LOG_FILE
+        self._log_fh = open(self._log_path, "ab", buffering=1 << 16)
+        self._log_lock = threading.Lock()
         self._load_existing_messages()
 
+        self.write_period = write_period
+        self._write_queue: Optional[queue.SimpleQueue] = None
+        if write_period > 0:
+            self._write_queue = queue.SimpleQueue()
+            self._wake = threading.Event()
+            self._stopping = False
+            self._writer = threading.Thread(
+                target=self._flush_loop, name="message-bus-writer", daemon=True,
+            )
+            self._writer.start()
+            atexit.register(self.close)
+
     def _load_existing_messages(self):
         """Load previously persisted messages from disk."""
-        for path in sorted(self.messages_dir.glob("*.json")):
+        loaded = []
+        try:
+            with open(self._log_path, "rb") as fh:
+                raw = fh.read()  # one sequential read of the whole log
+        except FileNotFoundError:
+            raw = b""
+        if raw:
+            for lineno, line in enumerate(raw.splitlines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    loaded.append(Message.from_dict(_loads(line)))
+                except Exception as e:
+                    logger.warning(f"Failed to load message {self._log_path}:{lineno}: {e}")
+
+        # Legacy per-message files: one directory scan, reads fanned out to threads.
+        with os.scandir(self.messages_dir) as it:
+            paths = sorted(e.path for e in it if e.name.endswith(".json") and e.is_file())
+        # Only files that parsed are migrated (and removed).
+        legacy: Dict[str, Message] = {}
+        if paths:
+            with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+                for path, msg in zip(paths, pool.map(_read_legacy, paths)):
+                    if msg is not None:
+                        loaded.append(msg)
+                        legacy[path] = msg
+
+        # Legacy file names are random UUIDs; restore publish order for bisect().
+        loaded.sort(key=lambda m: m._ts_ns)
+        for msg in loaded:
+            if msg.seq is None or msg.seq <= self._seq:
+                msg.seq = self._seq + 1
+            self._seq = msg.seq
+        if legacy:
+            self._migrate_legacy_files(legacy)
+        for msg in loaded:
+            self._index(msg)
+
+    def _migrate_legacy_files(self, legacy: Dict[str, Message]):
+        """Append legacy per-message JSON files to the log, then remove them."""
+        self._log_fh.writelines(self._serialize(msg) for msg in legacy.values())
+        self._log_fh.flush()
+        for path in legacy:
             try:
-                data = json.loads(path.read_text())
-                self._messages.append(Message.from_dict(data))
-            except Exception as e:
-                logger.warning(f"Failed to load message {path}: {e}")
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        logger.info(f"Migrated {len(legacy)} legacy message files to {self._log_path}")
+
+    @staticmethod
+    def _serialize(msg: Message) -> bytes:
+        """Render one message as a compact NDJSON line."""
+        if orjson is not None:
+            return orjson.dumps(msg.to_dict(), default=str, option=_ORJSON_OPTS)
+        return (json.dumps(msg.to_dict(), default=str) + "\n").encode()
+
+    def _take_queued(self) -> List[bytes]:
+        """Pop every pending line off the write queue."""
+        lines = []
+        try:
+            while True:
+                lines.append(self._write_queue.get_nowait())
+        except queue.Empty:
+            return lines
+
+    def _drain(self):
+        """Write every queued line to the log and flush once."""
+        with self._log_lock:
+            lines = self._take_queued()
+            if lines and not self._log_fh.closed:
+                self._log_fh.writelines(lines)
+                self._log_fh.flush()
+
+    def _flush_loop(self):
+        """Background writer: drain the queue every `write_period` seconds."""
+        while not self._stopping:
+            self._wake.wait(self.write_period)
+            self._wake.clear()
+            self._drain()
+
+    def _index(self, msg: Message):
+        """Append a message to the history and the per-field indexes."""
+        if self.max_in_memory is not None and len(self._messages) >= self.max_in_memory:
+            self._evict_oldest()
+        self._messages.append(msg)
+        self._by_to.setdefault(msg.to_agent, deque()).append(msg)
+        if msg._type_id >= 0:
+            self._by_type[msg._type_id].append(msg)
+        self._latest[(msg.to_agent, msg.type)] = msg
+
+    def _evict_oldest(self):
+        """Drop the oldest message from memory (it is always each bucket's head)."""
+        old = self._messages.popleft()
+        bucket = self._by_to[old.to_agent]
+        bucket.popleft()
+        if not bucket:
+            del self._by_to[old.to_agent]
+        if old._type_id >= 0:
+            self._by_type[old._type_id].popleft()
+        self._overflowed = True
+
+    def _scan_log(self, head: Message, to_agent: Optional[str] = None,
+                  msg_type: Optional[str] = None,
+                  since: Optional[int] = None) -> List[Message]:
+        """Read matching messages older than `head` back from the on-disk log.
+
+        Filters are applied to the parsed dict in the same pass, so only
+        matching lines are turned into Message objects.
+        """
+        if self._write_queue is not None:
+            self._drain()
+        with self._log_lock:
+            self._log_fh.flush()
+        try:
+            if os.stat(self._log_path).st_size == 0:
+                return []
+        except FileNotFoundError:
+            return []
+        older = []
+        with open(self._log_path, "rb") as fh, \
+                mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                try:
+                    data = _loads(line)
+                except ValueError:
+                    continue
+                # Cheapest tests first; unset filters short-circuit.
+                if msg_type and data["type"] != msg_type:
+                    continue
+                if to_agent and data["to_agent"] != to_agent:
+                    continue
+                if since is not None and _iso_to_ns(data["timestamp"]) <= since:
+                    continue
+                seq = data.get("seq")
+                # Lines written before seq numbering fall back to timestamps.
+                if (seq < head.seq) if seq is not None else (
+                        _iso_to_ns(data["timestamp"]) < head._ts_ns):
+                    older.append(Message.from_dict(data))
+        older.sort(key=lambda m: m._ts_ns)
+        return older
 
     def publish(self, from_agent: str, to_agent: str, msg_type: str,
                 payload: Dict) -> Message:
         """Publish a message to the bus."""
-        if msg_type not in self.VALID_TYPES:
-            raise ValueError(f"Invalid message type: {msg_type}. Valid: {self.VALID_TYPES}")
+        msg = self._new_message(from_agent, to_agent, msg_type, payload)
+        self._deliver(msg)
+        logger.info(f"Published: {msg}")
+        return msg
+
+    @staticmethod
+    def _new_message(from_agent: str, to_agent: str, msg_type: str,
+                     payload: Dict) -> Message:
+        if msg_type not in VALID_TYPES:
+            raise ValueError(
+                f"Invalid message type: {msg_type}. Valid: {', '.join(sorted(VALID_TYPES))}"
+            )
+        return Message(from_agent=from_agent, to_agent=to_agent,
+                       msg_type=msg_type, payload=payload)
 
-        msg = Message(from_agent=from_agent, to_agent=to_agent,
-                      msg_type=msg_type, payload=payload)
+    def _deliver(self, msg: Message):
+        """Record one message, then fan it out."""
+        self._record(msg)
+        self._fan_out(msg)
 
-        # Persist to disk
-        msg_path = self.messages_dir / f"{msg.message_id}.json"
-        msg_path.write_text(json.dumps(msg.to_dict(), indent=2, default=str))
+    def _record(self, msg: Message):
+        """Sequence, persist and index one message."""
+        self._seq += 1
+        msg.seq = self._seq
+
+        # Persist to disk: one buffered append instead of a file per message
+        if msg.type in self.persistent_types:
+            line = self._serialize(msg)
+            if self._write_queue is not None:
+                self._write_queue.put_nowait(line)
+                if self._write_queue.qsize() >= FLUSH_THRESHOLD:
+                    self._wake.set()
+            else:
+                with self._log_lock:
+                    self._log_fh.write(line)
+                    self._log_fh.flush()
 
         # Keep in memory
-        self._messages.append(msg)
+        self._index(msg)
 
-        # Notify subscribers
-        for subscriber_agent, callbacks in self._subscribers.items():
-            if subscriber_agent == to_agent or subscriber_agent == "*":
-                for cb in callbacks:
-                    try:
-                        cb(msg)
-                    except Exception as e:
-                        logger.error(f"Subscriber callback error: {e}")
+    def _fan_out(self, msg: Message):
+        """Hand a recorded message to its subscribers."""
+        subs = self._subs
+        targets = subs.get(msg.to_agent, ())
+        if msg.to_agent != "*":  # a broadcast already selected the "*" list
+            targets = (*targets, *subs.get("*", ()))
+        for cb in targets:
+            try:
+                cb(msg)
+            except Exception as e:
+                logger.error(f"Subscriber callback error: {e}")
 
-        logger.info(f"Published: {msg}")
-        return msg
+    def subscribe(self, agent_name: str, callback: Callable,
+                  isolated: bool = False,
+                  maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> Callable:
+        """Subscribe an agent to receive messages ("*" receives all).
+
+        By default the callback runs inline in publish(). With isolated=True
+        it runs on its own thread behind a bounded queue of `maxsize`
+        messages; when that queue is full new messages are dropped for this
+        subscriber and counted in dropped_messages(). Returns the callable
+        actually registered.
+        """
+        if isolated:
+            callback = _IsolatedSubscriber(agent_name, callback, maxsize)
+        with self._subs_lock:
+            subs = dict(self._subs)
+            subs[agent_name] = subs.get(agent_name, ()) + (callback,)
+            self._subs = MappingProxyType(subs)
+        return callback
 
-    def subscribe(self, agent_name: str, callback: Callable):
-        """Subscribe an agent to receive messages."""
-        if agent_name not in self._subscribers:
-            self._subscribers[agent_name] = []
-        self._subscribers[agent_name].append(callback)
+    def dropped_messages(self) -> Dict[str, int]:
+        """Messages dropped per agent by full isolated-subscriber queues."""
+        dropped: Dict[str, int] = {}
+        for callbacks in self._subs.values():
+            for cb in callbacks:
+                if isinstance(cb, _IsolatedSubscriber) and cb.dropped:
+                    dropped[cb.agent_name] = dropped.get(cb.agent_name, 0) + cb.dropped
+        return dropped
 
     def get_messages(self, to_agent: Optional[str] = None,
                      msg_type: Optional[str] = None,
-                     since: Optional[str] = None) -> List[Message]:
-        """Get messages, optionally filtered."""
-        result = self._messages
+                     since: Optional[Union[str, int]] = None) -> List[Message]:
+        """Get messages, optionally filtered.
 
+        `since` is an ISO-8601 timestamp or integer nanoseconds since the epoch.
+        """
+        if since is not None:
+            since = _to_ns(since)
+        result = self._filter(self._messages, to_agent, msg_type, since)
+        if self._overflowed and self._messages and (
+                since is None or since < self._messages[0]._ts_ns):
+            # The query reaches past the in-memory window: pull the rest from disk.
+            result = self._scan_log(self._messages[0], to_agent, msg_type, since) + result
+        return result
+
+    def _filter(self, messages, to_agent, msg_type, since) -> List[Message]:
+        """Filter the in-memory window using the per-field indexes."""
+        # Start from the smallest matching index bucket.
+        result = messages
+        need_to = need_type = False  # filters the chosen bucket doesn't imply
         if to_agent:
-            result = [m for m in result if m.to_agent == to_agent]
+            result = self._by_to.get(to_agent, ())
         if msg_type:
-            result = [m for m in result if m.type == msg_type]
-        if since:
-            result = [m for m in result if m.timestamp > since]
+            type_id = _TYPE_ID.get(msg_type)
+            by_type = self._by_type[type_id] if type_id is not None else ()
+            if not to_agent:
+                result = by_type
+            elif len(by_type) < len(result):
+                result, need_to = by_type, True
+            else:
+                need_type = True
+        if since is not None:
+            # Buckets are timestamp-ordered, so skip straight past `since`.
+            start = bisect.bisect_right(result, since, key=lambda m: m._ts_ns)
+            result = islice(result, start, None)
 
-        return result
+        # One pass, one allocation, plain attribute compares.
+        if need_to:
+            return [m for m in result if m.to_agent == to_agent]
+        if need_type:
+            return [m for m in result if m._type_id == type_id]
+        return list(result)
 
     def get_latest(self, to_agent: str, msg_type: str) -> Optional[Message]:
         """Get the most recent message of a given type for an agent."""
-        msgs = self.get_messages(to_agent=to_agent, msg_type=msg_type)
-        return msgs[-1] if msgs else None
+        return self._latest.get((to_agent, msg_type))
 
     def clear(self):
         """Clear all messages (in-memory and on disk)."""
         self._messages.clear()
-        for path in self.messages_dir.glob("*.json"):
-            path.unlink()
+        self._by_to.clear()
+        for bucket in self._by_type:
+            bucket.clear()
+        self._latest.clear()
+        self._overflowed = False
+        with self._log_lock:
+            if self._write_queue is not None:
+                self._take_queued()  # discard: these messages are being cleared too
+            self._log_fh.seek(0)
+            self._log_fh.truncate()
+        # Leftover legacy files (the open log itself is truncated above).
+        with os.scandir(self.messages_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    os.unlink(entry.path)
         logger.info("Message bus cleared")
+
+    def close(self):
+        """Stop isolated subscribers, drain queued writes and close the log."""
+        for callbacks in self._subs.values():
+            for cb in callbacks:
+                if isinstance(cb, _IsolatedSubscriber):
+                    cb.stop()
+        if self._write_queue is not None:
+            self._stopping = True
+            self._wake.set()
+            self._writer.join(timeout=max(1.0, 2 * self.write_period))
+            self._drain()
+            atexit.unregister(self.close)
+        with self._log_lock:
+            if not self._log_fh.closed:
+                self._log_fh.close()
@@ -0,0 +1,125 @@
+"""
+PostgreSQL LISTEN/NOTIFY Message Bus
+
+Cross-process variant of the file-based MessageBus. Every publish is also
+broadcast with `pg_notify` on the shared DatabasePool; a background thread
+holds a dedicated LISTEN connection and delivers messages published by other
+processes to local subscribers and the local history. The NDJSON log and
+in-memory indexes of MessageBus are reused unchanged, so queries behave the
+same as with the file backend.
+
+Select it with AGENT_BUS_BACKEND=pg (see `engine.agents.message_bus.create_bus`).
+"""
+
+import json
+import uuid
+import select
+import logging
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from engine.agents.message_bus import Message, MessageBus, orjson
+from engine.db.pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "agent_bus"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_NOTIFY_BYTES = 7900
+
+
+def _dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=str)
+
+
+class PgNotifyBus(MessageBus):
+    """MessageBus that also fans messages out across processes via Postgres."""
+
+    def __init__(self, messages_dir: Optional[str] = None, channel: str = CHANNEL,
+                 database_url: Optional[str] = None, **kwargs):
+        super().__init__(messages_dir=messages_dir, **kwargs)
+        self.channel = channel
+        self._pool = get_pool(database_url)
+        self._origin = uuid.uuid4().hex  # lets the listener skip our own echoes
+        self._deliver_lock = threading.Lock()
+        self._listening = True
+        self._listener = threading.Thread(
+            target=self._listen_loop, name="pg-bus-listener", daemon=True,
+        )
+        self._listener.start()
+
+    def publish(self, from_agent: str, to_agent: str, msg_type: str,
+                payload: Dict) -> Message:
+        msg = self._new_message(from_agent, to_agent, msg_type, payload)
+        self._deliver(msg, notify=True)
+        logger.info(f"Published: {msg}")
+        return msg
+
+    def _deliver(self, msg: Message, notify: bool = False):
+        # The lock only covers sequencing and the log/index. Subscribers run
+        # after it is released, so a callback that publishes a reply can't
+        # deadlock on it.
+        with self._deliver_lock:
+            self._record(msg)
+        if notify:
+            self._notify(msg)
+        self._fan_out(msg)
+
+    def _notify(self, msg: Message):
+        envelope = {"origin": self._origin, "message": msg.to_dict()}
+        body = _dumps(envelope)
+        if len(body.encode()) > MAX_NOTIFY_BYTES:
+            # Too large for NOTIFY: peers get the envelope and can read the
+            # full payload from the publisher's log if they need it.
+            envelope["message"]["payload"] = {"_truncated": True}
+            body = _dumps(envelope)
+        try:
+            with self._pool.get_session() as session:
+                session.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.channel, "payload": body},
+                )
+        except Exception as e:
+            logger.error(f"pg_notify failed for {msg}: {e}")
+
+    def _listen_loop(self):
+        """Hold a dedicated LISTEN connection and deliver remote messages."""
+        raw = self._pool.engine.raw_connection()
+        raw.detach()  # long-lived: keep it out of the shared pool's accounting
+        conn = raw.driver_connection
+        try:
+            conn.set_session(autocommit=True)
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}"')
+            while self._listening:
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._receive(conn.notifies.pop(0).payload)
+        except Exception as e:
+            logger.error(f"Message bus listener stopped: {e}")
+        finally:
+            conn.close()
+
+    def _receive(self, body: str):
+        try:
+            envelope = json.loads(body)
+            if envelope.get("origin") == self._origin:
+                return
+            msg = Message.from_dict(envelope["message"])
+        except Exception as e:
+            logger.warning(f"Ignoring malformed bus notification: {e}")
+            return
+        self._deliver(msg)
+        logger.info(f"Received: {msg}")
+
+    def close(self):
+        self._listening = False
+        self._listener.join(timeout=2.0)
+        super().close()
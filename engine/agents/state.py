@@ -2,23 +2,52 @@
 Shared State Management for Multi-Agent System
 
 Tracks agent statuses, portfolio state, and run history.
-Persisted to data/agent_state.json.
+Persisted to data/agent_state.json (periodic full snapshot) plus
+data/agent_state.log (append-only NDJSON mutation log replayed on load).
 """
 
+import os
 import json
 import logging
-from dataclasses import dataclass, field, asdict
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from datetime import datetime as _dt, timezone as _tz
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 STATE_FILE = Path("data/agent_state.json")
 
+# Rewrite the full snapshot (and truncate the log) after this many logged events.
+SNAPSHOT_EVERY = 200
+
+_UTC = _tz.utc
+
+
+def utcnow_iso() -> str:
+    """Current UTC time as an ISO-8601 string (shared by state and message bus)."""
+    return _dt.now(_UTC).isoformat()
+
 
-@dataclass
-class AgentState:
+class _DirtyTracked:
+    """Mixin: public attribute assignments mark the instance as needing a save
+    and are forwarded to ``_log_set`` for the mutation log."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if not name.startswith("_"):
+            object.__setattr__(self, "_dirty", True)
+            self._log_set(name, value)
+
+
+@dataclass(slots=True)
+class AgentState(_DirtyTracked):
     """State of a single agent."""
     agent_name: str
     status: str = "idle"  # idle, running, error, completed
@@ -26,33 +55,59 @@ class AgentState:
     iteration_count: int = 0
     last_updated: Optional[str] = None
     error_message: Optional[str] = None
+    _dirty: bool = field(default=True, init=False, repr=False, compare=False)
+    _owner: Optional["PortfolioState"] = field(default=None, init=False, repr=False, compare=False)
+
+    def _log_set(self, name: str, value):
+        owner = getattr(self, "_owner", None)
+        if owner is not None:
+            owner.log_event("set", ("agents", self.agent_name, name), value)
 
     def set_running(self, task: str):
         self.status = "running"
         self.current_task = task
-        self.last_updated = datetime.now(timezone.utc).isoformat()
+        self.last_updated = utcnow_iso()
 
     def set_completed(self):
         self.status = "completed"
         self.current_task = None
-        self.last_updated = datetime.now(timezone.utc).isoformat()
+        self.last_updated = utcnow_iso()
 
     def set_error(self, message: str):
         self.status = "error"
         self.error_message = message
-        self.last_updated = datetime.now(timezone.utc).isoformat()
+        self.last_updated = utcnow_iso()
 
     def set_idle(self):
         self.status = "idle"
         self.current_task = None
         self.iteration_count = 0
         self.error_message = None
-        self.last_updated = datetime.now(timezone.utc).isoformat()
+        self.last_updated = utcnow_iso()
 
+    def to_dict(self) -> Dict:
+        # Flat fields only, so a literal dict beats dataclasses.asdict()'s
+        # recursive deep copy.
+        return {
+            "agent_name": self.agent_name,
+            "status": self.status,
+            "current_task": self.current_task,
+            "iteration_count": self.iteration_count,
+            "last_updated": self.last_updated,
+            "error_message": self.error_message,
+        }
+
+
+@dataclass(slots=True)
+class PortfolioState(_DirtyTracked):
+    """Overall portfolio and orchestration state.
 
-@dataclass
-class PortfolioState:
-    """Overall portfolio and orchestration state."""
+    Attribute assignments are recorded as mutation-log events; in-place list
+    growth must go through the ``record_*`` helpers so it is logged too (use
+    ``mark_dirty()`` after any other in-place edit to force a full snapshot).
+    ``save()`` appends pending events to the log and only rewrites the full
+    snapshot every ``SNAPSHOT_EVERY`` events.
+    """
     run_id: Optional[str] = None
     mode: str = "idle"  # idle, backtest, validate, paper_trade, full
     agents: Dict[str, AgentState] = field(default_factory=dict)
@@ -63,18 +118,87 @@ class PortfolioState:
     run_history: List[Dict[str, Any]] = field(default_factory=list)
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
+    _dirty: bool = field(default=True, init=False, repr=False, compare=False)
+    # Mutation-log bookkeeping: events not yet written, the snapshot this
+    # instance is attached to, and the sequence number of the last event.
+    _pending: Optional[List[Dict[str, Any]]] = field(default=None, init=False, repr=False, compare=False)
+    _path: Optional[Path] = field(default=None, init=False, repr=False, compare=False)
+    _seq: int = field(default=0, init=False, repr=False, compare=False)
+    _logged_since_snapshot: int = field(default=0, init=False, repr=False, compare=False)
+    _force_snapshot: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        for agent in self.agents.values():
+            agent._owner = self
+        self._pending = []
 
     def get_agent(self, name: str) -> AgentState:
         """Get or create agent state."""
         if name not in self.agents:
-            self.agents[name] = AgentState(agent_name=name)
+            agent = AgentState(agent_name=name)
+            agent._owner = self
+            self.agents[name] = agent
+            self.log_event("set", ("agents", name), agent.to_dict())
         return self.agents[name]
 
+    def mark_dirty(self):
+        """Flag an in-place mutation the setattr hook cannot see."""
+        self._dirty = True
+        self._force_snapshot = True
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty or any(a._dirty for a in self.agents.values())
+
+    def record_backtest_result(self, result: Dict[str, Any]):
+        self.backtest_results.append(result)
+        self.log_event("append", ("backtest_results",), result)
+
+    def record_validation_result(self, result: Dict[str, Any]):
+        self.validation_results.append(result)
+        self.log_event("append", ("validation_results",), result)
+
+    def record_run(self, entry: Dict[str, Any]):
+        self.run_history.append(entry)
+        self.log_event("append", ("run_history",), entry)
+
+    def log_event(self, op: str, path: tuple, value):
+        """Queue one mutation ("set" or "append" at `path`) for the next save()."""
+        self._dirty = True
+        if getattr(self, "_pending", None) is None:  # constructing or replaying
+            return
+        self._seq += 1
+        self._pending.append({"seq": self._seq, "op": op, "path": path, "value": value})
+
+    def _log_set(self, name: str, value):
+        if name == "agents":
+            for agent in value.values():
+                agent._owner = self
+            value = {k: v.to_dict() for k, v in value.items()}
+        self.log_event("set", (name,), value)
+
+    def _apply(self, event: Dict[str, Any]):
+        """Replay one logged mutation (logging is suspended by the caller)."""
+        op, path, value = event["op"], event["path"], event["value"]
+        if path[0] == "agents":
+            if len(path) == 1:
+                self.agents = {k: AgentState(**v) for k, v in value.items()}
+            elif len(path) == 2:
+                agent = AgentState(**value)
+                agent._owner = self
+                self.agents[path[1]] = agent
+            else:
+                setattr(self.get_agent(path[1]), path[2], value)
+        elif op == "append":
+            getattr(self, path[0]).append(value)
+        else:
+            setattr(self, path[0], value)
+
     def to_dict(self) -> Dict:
         data = {
             "run_id": self.run_id,
             "mode": self.mode,
-            "agents": {k: asdict(v) for k, v in self.agents.items()},
+            "agents": {k: v.to_dict() for k, v in self.agents.items()},
             "backtest_results": self.backtest_results,
             "best_config": self.best_config,
             "validation_results": self.validation_results,
@@ -97,26 +221,106 @@ class PortfolioState:
             run_history=data.get("run_history", []),
             started_at=data.get("started_at"),
             completed_at=data.get("completed_at"),
+            agents={name: AgentState(**agent_data)
+                    for name, agent_data in data.get("agents", {}).items()},
         )
-        for name, agent_data in data.get("agents", {}).items():
-            state.agents[name] = AgentState(**agent_data)
         return state
 
     def save(self, path: Optional[Path] = None):
-        """Persist state to JSON file."""
+        """Persist state: append pending events to the log, or write a full snapshot.
+
+        No-op when nothing changed since the last save. A full snapshot is
+        written when this instance is not yet attached to `path` (or the
+        snapshot is gone), after an unlogged in-place edit, or every
+        SNAPSHOT_EVERY events; it goes to a
+        sibling temp file swapped in with os.replace(), so readers never see
+        a partially written document.
+        """
+        if not self.is_dirty:
+            return
         target = path or STATE_FILE
-        target.parent.mkdir(parents=True, exist_ok=True)
-        target.write_text(json.dumps(self.to_dict(), indent=2, default=str))
+        pending = self._pending
+        if (self._path != target or self._force_snapshot or not target.exists()
+                or self._logged_since_snapshot + len(pending) >= SNAPSHOT_EVERY):
+            self._write_snapshot(target)
+        elif pending:
+            with open(_log_path(target), "ab") as fh:
+                fh.write(b"".join(_dumps_line(e) for e in pending))
+            self._logged_since_snapshot += len(pending)
+        self._pending = []
+        self._dirty = False
+        for agent in self.agents.values():
+            agent._dirty = False
         logger.debug(f"State saved to {target}")
 
+    def _write_snapshot(self, target: Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        data = self.to_dict()
+        data["log_seq"] = self._seq  # events up to here are folded in
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        if orjson is not None:
+            tmp.write_bytes(orjson.dumps(
+                data, default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            ))
+        else:
+            tmp.write_text(json.dumps(data, indent=2, default=str))
+        os.replace(tmp, target)
+        _log_path(target).unlink(missing_ok=True)
+        self._path = target
+        self._logged_since_snapshot = 0
+        self._force_snapshot = False
+
     @classmethod
     def load(cls, path: Optional[Path] = None) -> "PortfolioState":
-        """Load state from JSON file, or return fresh state."""
+        """Load state from the snapshot plus the log tail, or return fresh state."""
         target = path or STATE_FILE
         if target.exists():
             try:
-                data = json.loads(target.read_text())
-                return cls.from_dict(data)
+                data = _loads(target.read_bytes())
+                state = cls.from_dict(data)
+                state._seq = data.get("log_seq", 0)
+                state._replay_log(target)
+                state._path = target
+                state._dirty = False
+                for agent in state.agents.values():
+                    agent._dirty = False
+                return state
             except Exception as e:
                 logger.warning(f"Failed to load state from {target}: {e}")
         return cls()
+
+    def _replay_log(self, target: Path):
+        log = _log_path(target)
+        if not log.exists():
+            return
+        snapshot_seq = self._seq
+        self._pending = None
+        try:
+            with open(log, "rb") as fh:
+                for line in fh:
+                    try:
+                        event = _loads(line)
+                    except ValueError:
+                        break  # torn final line from a crash mid-append
+                    if event["seq"] <= snapshot_seq:
+                        continue  # already folded into the snapshot
+                    self._apply(event)
+                    self._seq = event["seq"]
+                    self._logged_since_snapshot += 1
+        finally:
+            self._pending = []
+
+
+def _log_path(target: Path) -> Path:
+    return target.with_suffix(".log")
+
+
+def _dumps_line(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str,
+                            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return (json.dumps(obj, default=str) + "\n").encode()
+
+
+_loads = orjson.loads if orjson is not None else json.loads
@@ -424,6 +424,15 @@ class UI:
                     return txt;
                 }
 
+                // SVG line traces bog down past a few thousand points; switch to WebGL.
+                function lineType(n) { return n > 5000 ? 'scattergl' : 'scatter'; }
+                // Plotly takes typed arrays on linear axes without re-coercing
+                // each value. Float64 keeps prices exact; arrays with null gaps
+                // stay plain (a typed array would turn the gap into 0).
+                function numArray(a) {
+                    return (a && a.length && a.indexOf(null) < 0) ? Float64Array.from(a) : a;
+                }
+
                 // Add inline chart after markdown render (with download button)
                 function renderInlineChart(el) {
                     if (!el._pendingChart || !window.Plotly) return;
@@ -460,7 +469,7 @@ class UI:
                         };
 
                         if (data.type === 'equity_curve') {
-                            var eqTrace = {x:data.dates,y:data.equity,type:'scatter',mode:'lines',
+                            var eqTrace = {x:data.dates,y:numArray(data.equity),type:lineType(data.dates.length),mode:'lines',
                                 name:'Equity',line:{color:'#3b82f6',width:2},fill:'tozeroy',
                                 fillcolor:'rgba(59,130,246,0.08)'};
                             var capLine = {x:[data.dates[0],data.dates[data.dates.length-1]],
@@ -475,7 +484,7 @@ class UI:
                                 font:{size:13,color:'#1e293b'}};
                             Plotly.newPlot(chartDiv,[eqTrace,capLine],lightLayout,{responsive:true,displayModeBar:false});
                         } else {
-                            var trace = {x:data.dates,y:data.close,type:'scatter',mode:'lines',
+                            var trace = {x:data.dates,y:numArray(data.close),type:lineType(data.dates.length),mode:'lines',
                                 name:data.ticker,line:{color:'#3b82f6',width:2},fill:'tozeroy',
                                 fillcolor:'rgba(59,130,246,0.08)'};
                             lightLayout.title = {text:data.ticker+' — '+data.period,font:{size:13,color:'#1e293b'}};
@@ -558,34 +567,58 @@ class UI:
                         }
                     }, 100);
                 }
-                // Auto-render .marked elements on DOM changes
-                // Skip elements that are still streaming (have a .chat-streaming sibling)
+                // Auto-render .marked elements as they are added to the DOM.
+                // Only added nodes are inspected (streamed tokens mutate the
+                // body constantly); elements skipped while still streaming
+                // (non-empty .chat-streaming sibling) are retried next batch.
                 if (window.marked) {
-                    new MutationObserver(function() {
-                        document.querySelectorAll('.marked').forEach(function(el) {
-                            var parent = el.parentElement;
-                            if (parent) {
-                                var cursor = parent.querySelector('.chat-streaming');
-                                if (cursor && cursor.textContent) return;
-                            }
-                            var txt = el.textContent || el.innerText;
-                            if (txt.trim() && !el.dataset.rendering) {
-                                el.dataset.rendering = '1';
-                                setTimeout(function() {
-                                    if (!el.classList.contains('marked')) { delete el.dataset.rendering; return; }
-                                    var finalTxt = el.textContent || el.innerText;
-                                    if (finalTxt.trim()) {
-                                        finalTxt = extractAndRenderCharts(finalTxt, el);
-                                        el.innerHTML = finalTxt.trim() ? marked.parse(finalTxt) : '';
-                                        el.classList.remove('marked');
-                                        el.classList.add('marked-done');
-                                        postRenderEnhance(el);
-                                    }
-                                    delete el.dataset.rendering;
-                                }, 150);
+                    var pendingMarked = [];
+                    function scheduleMarked(el) {
+                        if (!el.isConnected || !el.classList.contains('marked')) return;
+                        var parent = el.parentElement;
+                        if (parent) {
+                            var cursor = parent.querySelector('.chat-streaming');
+                            if (cursor && cursor.textContent) { pendingMarked.push(el); return; }
+                        }
+                        var txt = el.textContent || el.innerText;
+                        if (txt.trim() && !el.dataset.rendering) {
+                            el.dataset.rendering = '1';
+                            setTimeout(function() {
+                                if (!el.classList.contains('marked')) { delete el.dataset.rendering; return; }
+                                var finalTxt = el.textContent || el.innerText;
+                                if (finalTxt.trim()) {
+                                    finalTxt = extractAndRenderCharts(finalTxt, el);
+                                    el.innerHTML = finalTxt.trim() ? marked.parse(finalTxt) : '';
+                                    el.classList.remove('marked');
+                                    el.classList.add('marked-done');
+                                    postRenderEnhance(el);
+                                }
+                                delete el.dataset.rendering;
+                            }, 150);
+                        }
+                    }
+                    function scheduleAllMarked() {
+                        var els = document.getElementsByClassName('marked');
+                        for (var i = els.length - 1; i >= 0; i--) scheduleMarked(els[i]);
+                    }
+                    new MutationObserver(function(mutations) {
+                        var els = pendingMarked;
+                        pendingMarked = [];
+                        for (var i = 0; i < mutations.length; i++) {
+                            var added = mutations[i].addedNodes;
+                            for (var j = 0; j < added.length; j++) {
+                                var n = added[j];
+                                if (n.nodeType !== 1) continue;
+                                if (n.classList.contains('marked')) els.push(n);
+                                var inner = n.getElementsByClassName('marked');
+                                for (var k = 0; k < inner.length; k++) els.push(inner[k]);
                             }
-                        });
+                        }
+                        for (var e = 0; e < els.length; e++) scheduleMarked(els[e]);
                     }).observe(document.body, {childList: true, subtree: true});
+                    // History rendered into the initial page adds no mutations.
+                    scheduleAllMarked();
+                    document.addEventListener('DOMContentLoaded', scheduleAllMarked);
                 }
             """),
         ]
@@ -616,6 +649,13 @@ class UI:
         )
 
 
+# Streamed model tokens are held for up to this long (or until this much text
+# is buffered) and then sent as a single OOB append, instead of one WebSocket
+# frame per token.
+TOKEN_FLUSH_INTERVAL = 0.01  # seconds
+TOKEN_FLUSH_CHARS = 4096
+
+
 # ---------------------------------------------------------------------------
 # Thread (conversation)
 # ---------------------------------------------------------------------------
@@ -633,6 +673,10 @@ class AGUIThread:
         self._suggestions: list[str] = []
         self._command_interceptor = None  # async callable(msg, session) -> str|None
         self._loaded = False
+        self._token_id: Optional[str] = None   # element the buffered tokens append to
+        self._token_buf: list[str] = []
+        self._token_chars = 0
+        self._token_flusher: Optional[asyncio.Task] = None
 
     def _ensure_loaded(self):
         """Load messages from DB on first access."""
@@ -652,9 +696,43 @@ class AGUIThread:
         self._connections.pop(connection_id, None)
 
     async def send(self, element):
+        await self._flush_tokens()  # keep buffered tokens ahead of this element
+        await self._send_now(element)
+
+    async def _send_now(self, element):
         for _, send_fn in self._connections.items():
             await send_fn(element)
 
+    async def _send_token(self, content_id: str, token: str):
+        """Queue a streamed token for ``content_id``; flushed within TOKEN_FLUSH_INTERVAL."""
+        if self._token_id != content_id:
+            await self._flush_tokens()
+            self._token_id = content_id
+        self._token_buf.append(token)
+        self._token_chars += len(token)
+        if self._token_chars >= TOKEN_FLUSH_CHARS:
+            await self._flush_tokens()
+        elif self._token_flusher is None:
+            self._token_flusher = asyncio.ensure_future(self._flush_tokens_later())
+
+    async def _flush_tokens_later(self):
+        await asyncio.sleep(TOKEN_FLUSH_INTERVAL)
+        self._token_flusher = None
+        try:
+            await self._flush_tokens()
+        except Exception:
+            pass  # a dead connection surfaces on the handler's next send
+
+    async def _flush_tokens(self):
+        """Send every buffered token as one OOB append."""
+        if self._token_flusher is not None and self._token_flusher is not asyncio.current_task():
+            self._token_flusher.cancel()
+            self._token_flusher = None
+        if not self._token_buf:
+            return
+        text, self._token_buf, self._token_chars = "".join(self._token_buf), [], 0
+        await self._send_now(Span(text, id=self._token_id, hx_swap_oob="beforeend"))
+
     async def _send_js(self, js_code: str):
         """Execute JS in the browser via OOB swap into the hidden agui-js div."""
         await self.send(Div(Script(js_code), id="agui-js", hx_swap_oob="innerHTML"))
@@ -813,11 +891,7 @@ class AGUIThread:
                         token = chunk.content
                         full_response += token
                         # Append token to streaming bubble
-                        await self.send(Span(
-                            token,
-                            id=content_id,
-                            hx_swap_oob="beforeend",
-                        ))
+                        await self._send_token(content_id, token)
 
                 elif kind == "on_tool_start":
                     tool_name = event.get("name", "tool")
@@ -147,6 +147,12 @@ CHAT_JS = r"""
     var a=-c; return 'rgb('+Math.round(122+58*a)+','+Math.round(134-63*a)+','+Math.round(126-79*a)+')';
   }
   var PALETTE=['#1F5D43','#B4472F','#3E7CB1','#C89B3C','#7A5FA0','#4C9A82','#B4657A','#6E8C4E'];
+  // SVG line traces bog down past a few thousand points; switch to WebGL.
+  function lineType(n){ return n>5000?'scattergl':'scatter'; }
+  // Plotly takes typed arrays on linear axes without re-coercing each value.
+  // Float64 keeps prices exact; arrays with null gaps stay plain (a typed
+  // array would turn the gap into 0).
+  function numArray(a){ return (a&&a.length&&a.indexOf(null)<0)?Float64Array.from(a):a; }
 
   function renderChart(bubble){
     if(!bubble || !bubble._chart || !window.Plotly) return;
@@ -189,12 +195,13 @@ CHAT_JS = r"""
         font:{color:'#415046',size:10}},{responsive:true,displayModeBar:false});
 
     } else if(data.type==='candlestick'){
-      var cs={x:data.dates,open:data.open,high:data.high,low:data.low,close:data.close,
+      var cs={x:data.dates,open:numArray(data.open),high:numArray(data.high),
+        low:numArray(data.low),close:numArray(data.close),
         type:'candlestick',name:data.ticker,xaxis:'x',yaxis:'y',
         increasing:{line:{color:'#1F5D43'}},decreasing:{line:{color:'#B4472F'}}};
       var traces=[cs];
       if(data.volume && data.volume.length){
-        traces.push({x:data.dates,y:data.volume,type:'bar',name:'Vol',xaxis:'x',yaxis:'y2',
+        traces.push({x:data.dates,y:numArray(data.volume),type:'bar',name:'Vol',xaxis:'x',yaxis:'y2',
           marker:{color:'rgba(122,134,126,0.35)'}});
       }
       Plotly.newPlot(div,traces,{paper_bgcolor:'#FFFFFF',plot_bgcolor:'#F7F6F1',
@@ -208,7 +215,7 @@ CHAT_JS = r"""
     } else if(data.type==='compare'){
       var ct=(data.series||[]).map(function(s,i){
         var last=s.pct[s.pct.length-1];
-        return {x:s.dates,y:s.pct,type:'scatter',mode:'lines',
+        return {x:s.dates,y:numArray(s.pct),type:lineType(s.dates.length),mode:'lines',
           name:s.name+' '+(last>=0?'+':'')+last.toFixed(1)+'%',
           line:{color:PALETTE[i%PALETTE.length],width:2}};
       });
@@ -217,7 +224,7 @@ CHAT_JS = r"""
       Plotly.newPlot(div,ct,base,{responsive:true,displayModeBar:false});
 
     } else if(data.type==='equity_curve'){
-      var eq={x:data.dates,y:data.equity,type:'scatter',mode:'lines',name:'Equity',
+      var eq={x:data.dates,y:numArray(data.equity),type:lineType(data.dates.length),mode:'lines',name:'Equity',
         line:{color:'#1F5D43',width:2},fill:'tozeroy',fillcolor:'rgba(31,93,67,0.08)'};
       var cap={x:[data.dates[0],data.dates[data.dates.length-1]],
         y:[data.initial_capital,data.initial_capital],type:'scatter',mode:'lines',
@@ -258,7 +265,7 @@ CHAT_JS = r"""
         {responsive:true,displayModeBar:false});
 
     } else {
-      var tr={x:data.dates,y:data.close,type:'scatter',mode:'lines',name:data.ticker,
+      var tr={x:data.dates,y:numArray(data.close),type:lineType(data.dates.length),mode:'lines',name:data.ticker,
         line:{color:'#1F5D43',width:2},fill:'tozeroy',fillcolor:'rgba(31,93,67,0.08)'};
       base.title={text:data.ticker+' — '+data.period,font:{size:13,color:'#14231B'}};
       base.showlegend=false;
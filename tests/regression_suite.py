@@ -136,6 +136,46 @@ class TestAgentState(unittest.TestCase):
         finally:
             path.unlink(missing_ok=True)
 
+    def test_portfolio_state_save_skips_when_clean(self):
+        import tempfile
+        from agents.shared.state import PortfolioState
+        state = PortfolioState(run_id="dirty-test", mode="paper")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "state.json"
+            state.save(path)
+            self.assertFalse(state.is_dirty)
+            self.assertEqual(os.listdir(tmpdir), ["state.json"])  # tmp file swapped in
+
+            path.unlink()
+            state.save(path)
+            self.assertFalse(path.exists())  # clean → no write
+
+            state.get_agent("validator").set_running("trade_validation")
+            state.record_validation_result({"status": "passed"})
+            state.save(path)
+            loaded = PortfolioState.load(path)
+            self.assertEqual(loaded.agents["validator"].status, "running")
+            self.assertEqual(loaded.validation_results, [{"status": "passed"}])
+
+    def test_portfolio_state_log_replay(self):
+        import tempfile
+        from agents.shared.state import PortfolioState
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "state.json"
+            state = PortfolioState(run_id="wal-test")
+            state.save(path)  # full snapshot
+
+            state.mode = "backtest"
+            state.get_agent("backtester").set_completed()
+            state.record_backtest_result({"sharpe": 1.2})
+            state.save(path)  # appended to the log only
+            self.assertTrue(path.with_suffix(".log").exists())
+
+            loaded = PortfolioState.load(path)
+            self.assertEqual(loaded.mode, "backtest")
+            self.assertEqual(loaded.agents["backtester"].status, "completed")
+            self.assertEqual(loaded.backtest_results, [{"sharpe": 1.2}])
+
 
 # ---------------------------------------------------------------------------
 # 3. Message Bus
@@ -161,6 +201,103 @@ class TestMessageBus(unittest.TestCase):
             self.assertEqual(len(msgs), 1)
             self.assertEqual(msgs[0].payload["sharpe"], 2.5)
 
+    def test_filters_and_subscriber_fanout(self):
+        import tempfile
+        from agents.shared.message_bus import Message, MessageBus
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bus = MessageBus(messages_dir=tmpdir)
+            direct, wildcard = [], []
+            bus.subscribe("validator", direct.append)
+            bus.subscribe("*", wildcard.append)
+            m1 = bus.publish("backtester", "validator", "validation_request", {})
+            m2 = bus.publish("backtester", "portfolio_manager", "backtest_result", {})
+            m3 = bus.publish("validator", "validator", "correction", {})
+            m4 = bus.publish("orchestrator", "*", "error", {})
+
+            self.assertEqual(direct, [m1, m3])
+            self.assertEqual(wildcard, [m1, m2, m3, m4])  # broadcast delivered once
+            self.assertEqual(bus.get_messages(to_agent="validator", msg_type="correction"), [m3])
+            self.assertEqual(bus.get_messages(since=m1.timestamp), [m2, m3, m4])
+            self.assertEqual(bus.get_messages(since=m1._ts_ns), [m2, m3, m4])
+            self.assertEqual(Message.from_dict(m2.to_dict())._ts_ns, m2._ts_ns)
+            self.assertIs(bus.get_latest("validator", "validation_request"), m1)
+
+    def test_isolated_subscriber_drops_on_overflow(self):
+        import tempfile
+        import threading
+        from agents.shared.message_bus import MessageBus
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bus = MessageBus(messages_dir=tmpdir)
+            release, seen = threading.Event(), []
+            bus.subscribe("validator", lambda m: (release.wait(5), seen.append(m)),
+                          isolated=True, maxsize=2)
+            for _ in range(5):
+                bus.publish("backtester", "validator", "validation_request", {})
+            # One message in the blocked callback, two queued, the rest dropped.
+            release.set()
+            bus.close()
+            self.assertEqual(len(seen) + bus.dropped_messages()["validator"], 5)
+            self.assertGreaterEqual(bus.dropped_messages()["validator"], 2)
+
+    def test_pg_bus_subscriber_can_publish_reply(self):
+        import tempfile
+        import threading
+        from contextlib import contextmanager
+        from engine.agents.pg_bus import PgNotifyBus
+
+        class FakePool:
+            notified = []
+
+            class engine:  # the listener gives up at once: no LISTEN here
+                @staticmethod
+                def raw_connection():
+                    conn = MagicMock()
+                    conn.set_session.side_effect = RuntimeError("no database")
+                    return MagicMock(driver_connection=conn)
+
+            @contextmanager
+            def get_session(self):
+                yield MagicMock(execute=lambda stmt, params: FakePool.notified.append(params))
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch("engine.agents.pg_bus.get_pool", return_value=FakePool()):
+            bus = PgNotifyBus(messages_dir=tmpdir)
+            replies = []
+            bus.subscribe("backtester", lambda m: bus.publish(
+                "backtester", m.from_agent, "backtest_result", {}))
+            bus.subscribe("portfolio_manager", replies.append)
+            done = threading.Event()
+            threading.Thread(target=lambda: (bus.publish(
+                "portfolio_manager", "backtester", "backtest_request", {}), done.set()),
+                daemon=True).start()
+            self.assertTrue(done.wait(5), "publish deadlocked in a replying subscriber")
+            self.assertEqual([m.type for m in replies], ["backtest_result"])
+            self.assertEqual(len(FakePool.notified), 2)
+            bus.close()
+
+    def test_ephemeral_types_are_not_persisted(self):
+        import tempfile
+        from agents.shared.message_bus import MessageBus
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bus = MessageBus(messages_dir=tmpdir)
+            bus.publish("portfolio_manager", "backtester", "backtest_request", {})
+            kept = bus.publish("backtester", "portfolio_manager", "backtest_result", {})
+            self.assertEqual(len(bus.get_messages()), 2)
+            bus.close()
+            reloaded = MessageBus(messages_dir=tmpdir)
+            self.assertEqual([m.message_id for m in reloaded.get_messages()], [kept.message_id])
+
+    def test_bounded_memory_reads_overflow_from_log(self):
+        import tempfile
+        from agents.shared.message_bus import MessageBus
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bus = MessageBus(messages_dir=tmpdir, max_in_memory=3)
+            for i in range(10):
+                bus.publish("paper_trader", "portfolio_manager", "trade_update", {"i": i})
+            self.assertEqual(len(bus._messages), 3)
+            self.assertEqual([m.payload["i"] for m in bus.get_messages()], list(range(10)))
+            self.assertEqual(bus.get_latest("portfolio_manager", "trade_update").payload["i"], 9)
+
     def test_invalid_message_type(self):
         import tempfile
         from agents.shared.message_bus import MessageBus
@@ -563,6 +700,56 @@ class TestValidateAgent(unittest.TestCase):
         self.assertEqual(d["total_trades_checked"], 10)
         self.assertEqual(d["iterations_used"], 1)
 
+    def test_run_corrects_pnl_and_fetches_each_symbol_day_once(self):
+        import pandas as pd
+        from agents.validate_agent import ValidateAgent
+
+        class StubFeed:
+            calls = 0
+
+            def get_intraday_prices(self, symbol, date, interval="5"):
+                StubFeed.calls += 1
+                idx = pd.date_range(date, periods=24 * 60, freq="1min")
+                return pd.DataFrame({"Close": [100.0] * len(idx)}, index=idx)
+
+        agent = ValidateAgent(max_iterations=3)
+        agent.market_data = StubFeed()
+        trades = [
+            {"symbol": "AAPL", "entry_time": "2024-01-16T15:00:00Z",
+             "exit_time": "2024-01-16T18:00:00Z", "entry_price": 100.0,
+             "exit_price": 100.0, "shares": 10, "pnl": 5.0},
+            {"ticker": "AAPL", "entry_time": "2024-01-16T16:00:00Z",
+             "exit_time": "2024-01-16T19:00:00Z", "entry_price": 100.0,
+             "exit_price": 100.0, "qty": 5, "pnl": 0.0},
+        ]
+        result = agent.run({"run_id": "t", "trades": trades})
+        self.assertEqual(result["status"], "corrected")
+        self.assertEqual(result["corrections"][0]["type"], "pnl_recalculation")
+        self.assertEqual(result["corrections"][0]["trade_index"], 0)
+        self.assertEqual(StubFeed.calls, 1)
+
+        # Bars are cached per run: a later run on the same agent refetches.
+        agent.run({"run_id": "t2", "trades": trades})
+        self.assertEqual(StubFeed.calls, 2)
+
+    def test_empty_day_bars_are_not_cached(self):
+        import pandas as pd
+        from agents.validate_agent import ValidateAgent
+
+        class EmptyFeed:
+            calls = 0
+
+            def get_intraday_prices(self, symbol, date, interval="5"):
+                EmptyFeed.calls += 1
+                return pd.DataFrame()
+
+        agent = ValidateAgent()
+        agent.market_data = EmptyFeed()
+        agent._get_day_bars("AAPL", "2024-01-16")
+        agent._get_day_bars("AAPL", "2024-01-16")
+        self.assertEqual(EmptyFeed.calls, 2)
+        self.assertEqual(agent._day_bars, {})
+
 
 # ---------------------------------------------------------------------------
 # 14. Config Loading
@@ -775,6 +962,110 @@ class TestAGUICommandDetection(unittest.TestCase):
         for cmd in ["status", "help", "positions", "account", "accounts"]:
             self.assertIn(cmd, _CLI_EXACT, f"{cmd} not in _CLI_EXACT")
 
+    def test_command_regex(self):
+        from agui_app import _CLI_COMMAND_RE
+        for msg in ["agent:backtest lookback:1m", "  News:TSLA", "trades",
+                    "chart:AAPL period:1y", "equity paper btd", "Accounts ",
+                    "account:switch 2", "alpaca:positions"]:
+            self.assertTrue(_CLI_COMMAND_RE.match(msg), msg)
+        for msg in ["help me pick a stock", "newsy", "what is the price of AAPL",
+                    "accountsx", "", "   "]:
+            self.assertIsNone(_CLI_COMMAND_RE.match(msg), msg)
+
+
+class TestAGUIConditionalRequests(unittest.TestCase):
+    """Test If-None-Match handling for cached pages and assets."""
+
+    def test_etag_matches_parses_header_lists(self):
+        from types import SimpleNamespace
+        from agui_app import _etag_matches
+
+        def req(value=None):
+            return SimpleNamespace(headers={} if value is None else {"if-none-match": value})
+
+        for value in ['"abc"', 'W/"abc"', '"x", W/"abc"', "*", ' "zz" ,"abc" ']:
+            self.assertTrue(_etag_matches(req(value), "abc"), value)
+        for value in [None, "", '"abcd"', 'W/"ab"', '"x", "y"', "abc-br"]:
+            self.assertFalse(_etag_matches(req(value), "abc"), value)
+
+
+class TestChartDownsampling(unittest.TestCase):
+    """Test that long OHLC series are merged into bounded candle buckets."""
+
+    def test_downsample_preserves_range_and_volume(self):
+        import numpy as np
+        from agui_app import _downsample_ohlc
+
+        n = 5000
+        closes = np.linspace(100.0, 200.0, n)
+        ohlc = np.stack([closes - 1, closes + 2, closes - 2, closes])
+        volume = np.ones(n, dtype="int64")
+        dates, merged, vols = _downsample_ohlc(list(range(n)), ohlc, volume, max_points=1000)
+
+        self.assertEqual(len(dates), 1000)
+        self.assertEqual(merged.shape, (4, 1000))
+        self.assertEqual(merged[1].max(), ohlc[1].max())
+        self.assertEqual(merged[2].min(), ohlc[2].min())
+        self.assertEqual(merged[3][-1], closes[-1])
+        self.assertEqual(int(vols.sum()), n)
+
+    def test_short_series_untouched(self):
+        import numpy as np
+        from agui_app import _downsample_ohlc
+
+        ohlc = np.zeros((4, 10))
+        dates, merged, vols = _downsample_ohlc(list(range(10)), ohlc, [])
+        self.assertIs(merged, ohlc)
+        self.assertEqual(vols, [])
+
+
+class TestAGUITokenStream(unittest.TestCase):
+    """Test that streamed tokens are coalesced into few WebSocket sends."""
+
+    def test_tokens_coalesce_and_flush_before_other_sends(self):
+        from fasthtml.common import Span, to_xml
+        from engine.ai.core import AGUIThread
+
+        sent = []
+
+        async def send(el):
+            sent.append(to_xml(el))
+
+        async def run():
+            thread = AGUIThread("test-thread", None)
+            thread.subscribe("conn", send)
+            for tok in ["Hel", "lo", " <b>"]:
+                await thread._send_token("msg-1", tok)
+            await thread._send_token("msg-2", "x")
+            await thread.send(Span("done", id="end"))
+            self.assertIsNone(thread._token_flusher)
+
+        asyncio.run(run())
+        self.assertEqual(len(sent), 3)
+        self.assertIn('id="msg-1">Hello &lt;b&gt;</span>', sent[0])
+        self.assertIn('id="msg-2">x</span>', sent[1])
+        self.assertIn('id="end">done</span>', sent[2])
+
+    def test_large_buffer_flushes_without_waiting(self):
+        from fasthtml.common import to_xml
+        from engine.ai.core import AGUIThread, TOKEN_FLUSH_CHARS
+
+        sent = []
+
+        async def send(el):
+            sent.append(to_xml(el))
+
+        async def run():
+            thread = AGUIThread("test-thread", None)
+            thread.subscribe("conn", send)
+            await thread._send_token("msg-1", "a" * (TOKEN_FLUSH_CHARS - 1))
+            self.assertEqual(sent, [])
+            await thread._send_token("msg-1", "b")
+            self.assertEqual(len(sent), 1)
+            self.assertIsNone(thread._token_flusher)
+
+        asyncio.run(run())
+
 
 # ---------------------------------------------------------------------------
 # 20. End-to-end: Command → DB Query → Result
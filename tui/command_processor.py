@@ -375,13 +375,13 @@ class CommandProcessor:
             df = await asyncio.to_thread(get_intraday_data, ticker, interval=interval, period=period)
             if df.empty:
                 return f"No chart data for `{ticker}`"
+            from utils.equity_chart import chart_json as _chart_json
             dates = [d.isoformat() if hasattr(d, 'isoformat') else str(d) for d in df.index]
-            closes = [round(float(c), 2) for c in df["Close"]]
-            chart_json = json.dumps({
+            chart_json = _chart_json({
                 "ticker": ticker,
                 "period": period,
                 "dates": dates,
-                "close": closes,
+                "close": df["Close"].to_numpy(dtype=float).round(2),
             })
             return f"__CHART_DATA__{chart_json}__END_CHART__"
         except Exception as e:
@@ -468,7 +468,8 @@ class CommandProcessor:
             dates = [t[0].isoformat() if hasattr(t[0], 'isoformat') else str(t[0]) for t in trades]
             equity = [round(float(t[1]), 2) for t in trades]
 
-            chart_json = json.dumps({
+            from utils.equity_chart import chart_json as _chart_json
+            chart_json = _chart_json({
                 "type": "equity_curve",
                 "run_id": full_rid,
                 "dates": dates,
@@ -2096,7 +2097,8 @@ Type 'help' for available commands.
         if not self.app.command_history:
             return "No commands executed yet."
 
-        history = self.app.command_history[-5:]
+        # command_history may be a bounded deque, which doesn't slice.
+        history = list(self.app.command_history)[-5:]
         return "\n".join([f"{i+1}. `{cmd}`" for i, cmd in enumerate(history)])
 
     # ------------------------------------------------------------------
@@ -9,6 +9,7 @@ try:
 except ModuleNotFoundError:
     pass  # readline unavailable on Windows; arrow keys still work via prompt_toolkit
 import threading
+from collections import deque
 from typing import Optional
 from rich.console import Console
 from rich.markdown import Markdown
@@ -24,7 +25,7 @@ class StrategyCLI:
         self.user_id = user_id
         self.user_email = user_email
         self.user_display = user_display or user_email  # fallback to email if no name
-        self.command_history = []
+        self.command_history = deque(maxlen=500)  # bounded for long sessions
         self.current_strategy = None
         self.current_symbols = []
         self.account_id = None
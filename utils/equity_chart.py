@@ -3,6 +3,22 @@
 import json
 from typing import Optional
 
+try:
+    import orjson  # optional: faster chart payload serialization
+except ImportError:
+    orjson = None
+
+
+def chart_json(payload: dict) -> str:
+    """Serialize a __CHART_DATA__ payload compactly.
+
+    Values may be 1-D NumPy arrays; orjson writes them (and NaN, as null)
+    without boxing each element into a Python float.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(payload, separators=(",", ":"), default=lambda a: a.tolist())
+
 
 def show_equity_curve(run_id: str = "", trade_type: str = "",
                       strategy: str = "", user_id: Optional[str] = None) -> str:
@@ -78,7 +94,7 @@ def show_equity_curve(run_id: str = "", trade_type: str = "",
         dates = [t[0].isoformat() if hasattr(t[0], 'isoformat') else str(t[0]) for t in trades]
         equity = [round(float(t[1]), 2) for t in trades]
 
-        chart_data = json.dumps({
+        chart_data = chart_json({
             "type": "equity_curve",
             "run_id": rid,
             "dates": dates,